@@ -1,16 +1,33 @@
+import hashlib
+import inspect
 import os
+from contextlib import AsyncExitStack, asynccontextmanager
 
 import httpx
-from fastapi import Cookie, Depends, FastAPI, Header, HTTPException, Request, Response, status
+from fastapi import Cookie, Depends, FastAPI, Header, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from prometheus_client import Counter
 
+from packages.shared.cache import TTLCache
 from packages.shared.schemas import ImportSongRequest, RefreshRequest, SignInRequest, SignUpRequest, VerifyEmailRequest
-from packages.shared.internal_auth import create_service_token
-from packages.shared.rate_limit import InMemoryRateLimiter
+from packages.shared.internal_auth import service_token
+from packages.shared.rate_limit import make_rate_limiter
 from packages.shared.security import decode_token, validate_security_runtime
 
+from app.upstreams import UpstreamConfig, UpstreamPool, register_pool_metrics
 
-app = FastAPI(title="api-gateway")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await upstreams.start()
+    try:
+        yield
+    finally:
+        await upstreams.aclose()
+
+
+app = FastAPI(title="api-gateway", lifespan=lifespan)
 from packages.shared.observability import register_observability
 register_observability(app, app.title)
 validate_security_runtime()
@@ -36,6 +53,26 @@ def env_int(name: str, default: int) -> int:
         return default
 
 
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    value = value.strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
 raw_cors = env_str(
     "CORS_ALLOWED_ORIGINS",
     "http://localhost:3000,http://127.0.0.1:3000,http://localhost:3001,http://127.0.0.1:3001",
@@ -57,6 +94,48 @@ STREAM_SERVICE_URL = os.getenv("STREAM_SERVICE_URL", "http://stream-service:8000
 ADMIN_SERVICE_URL = os.getenv("ADMIN_SERVICE_URL", "http://admin-service:8000")
 API_GATEWAY_SERVICE_NAME = os.getenv("API_GATEWAY_SERVICE_NAME", "api-gateway")
 
+UPSTREAM_MAX_CONNECTIONS = env_int("UPSTREAM_MAX_CONNECTIONS", 100)
+UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = env_int("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", 20)
+UPSTREAM_KEEPALIVE_EXPIRY_SECONDS = env_float("UPSTREAM_KEEPALIVE_EXPIRY_SECONDS", 30.0)
+UPSTREAM_CONNECT_TIMEOUT_SECONDS = env_float("UPSTREAM_CONNECT_TIMEOUT_SECONDS", 5.0)
+UPSTREAM_HTTP2 = env_bool("UPSTREAM_HTTP2", False)
+
+
+def upstream_config(
+    name: str,
+    env_prefix: str,
+    base_url: str,
+    timeout_seconds: float,
+    max_connections: int | None = None,
+) -> UpstreamConfig:
+    return UpstreamConfig(
+        name=name,
+        base_url=base_url,
+        timeout_seconds=env_float(f"{env_prefix}_TIMEOUT_SECONDS", timeout_seconds),
+        connect_timeout_seconds=env_float(f"{env_prefix}_CONNECT_TIMEOUT_SECONDS", UPSTREAM_CONNECT_TIMEOUT_SECONDS),
+        max_connections=env_int(f"{env_prefix}_MAX_CONNECTIONS", max_connections or UPSTREAM_MAX_CONNECTIONS),
+        max_keepalive_connections=env_int(
+            f"{env_prefix}_MAX_KEEPALIVE_CONNECTIONS", UPSTREAM_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        keepalive_expiry_seconds=env_float(f"{env_prefix}_KEEPALIVE_EXPIRY_SECONDS", UPSTREAM_KEEPALIVE_EXPIRY_SECONDS),
+        http2=env_bool(f"{env_prefix}_HTTP2", UPSTREAM_HTTP2),
+    )
+
+
+upstreams = UpstreamPool(
+    [
+        upstream_config("auth-service", "AUTH_SERVICE", AUTH_SERVICE_URL, 30),
+        upstream_config("search-service", "SEARCH_SERVICE", SEARCH_SERVICE_URL, 60),
+        upstream_config("download-service", "DOWNLOAD_SERVICE", DOWNLOAD_SERVICE_URL, 60),
+        # Job event streams sit idle for minutes; a separate pool keeps them from starving regular calls.
+        upstream_config("download-events", "DOWNLOAD_EVENTS", DOWNLOAD_SERVICE_URL, 60, max_connections=2000),
+        upstream_config("catalog-service", "CATALOG_SERVICE", CATALOG_SERVICE_URL, 30),
+        upstream_config("stream-service", "STREAM_SERVICE", STREAM_SERVICE_URL, 30),
+        upstream_config("admin-service", "ADMIN_SERVICE", ADMIN_SERVICE_URL, 30),
+    ]
+)
+register_pool_metrics(upstreams)
+
 REFRESH_COOKIE_NAME = env_str("REFRESH_COOKIE_NAME", "refresh_token")
 REFRESH_COOKIE_SECURE = os.getenv("REFRESH_COOKIE_SECURE", "0").lower() in {"1", "true", "yes", "on"}
 REFRESH_COOKIE_DOMAIN = os.getenv("REFRESH_COOKIE_DOMAIN") or None
@@ -67,21 +146,38 @@ SIGNIN_IP_LIMIT = env_int("RATE_LIMIT_SIGNIN_IP_PER_MIN", 20)
 SIGNIN_EMAIL_LIMIT = env_int("RATE_LIMIT_SIGNIN_EMAIL_PER_MIN", 10)
 SIGNUP_IP_LIMIT = env_int("RATE_LIMIT_SIGNUP_IP_PER_HOUR", 30)
 SEARCH_USER_LIMIT = env_int("RATE_LIMIT_SEARCH_PER_MIN", 120)
+SUGGEST_USER_LIMIT = env_int("RATE_LIMIT_SUGGEST_PER_MIN", 600)
 IMPORT_USER_LIMIT = env_int("RATE_LIMIT_IMPORT_PER_HOUR", 120)
-limiter = InMemoryRateLimiter()
+limiter = make_rate_limiter()
+
+ACCESS_TOKEN_CACHE_SIZE = env_int("ACCESS_TOKEN_CACHE_SIZE", 10_000)
+access_token_cache = TTLCache(ACCESS_TOKEN_CACHE_SIZE)
+ACCESS_TOKEN_CACHE_REQUESTS = Counter(
+    "gateway_access_token_cache_requests_total",
+    "Bearer access token verifications served from cache",
+    ["result"],
+)
 
 
 def bearer_token_dep(authorization: str | None = Header(default=None, alias="Authorization")) -> dict:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="missing bearer token")
     token = authorization.split(" ", 1)[1].strip()
+    # Only successfully verified access tokens are cached, and only until their exp.
+    cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = access_token_cache.get(cache_key)
+    if cached is not None:
+        ACCESS_TOKEN_CACHE_REQUESTS.labels("hit").inc()
+        return dict(cached)
+    ACCESS_TOKEN_CACHE_REQUESTS.labels("miss").inc()
     try:
         claims = decode_token(token)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
     if claims.get("type") != "access":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid token type")
-    return claims
+    access_token_cache.set(cache_key, claims, float(claims.get("exp") or 0))
+    return dict(claims)
 
 
 def require_admin(claims: dict = Depends(bearer_token_dep)) -> dict:
@@ -109,19 +205,76 @@ def request_ip(request: Request) -> str:
     return "unknown"
 
 
-def enforce_rate_limit(key: str, limit: int, window_seconds: int) -> None:
-    if limiter.check(key, limit, window_seconds):
+async def enforce_rate_limit(key: str, limit: int, window_seconds: int) -> None:
+    await enforce_rate_limits([(key, limit, window_seconds)])
+
+
+async def enforce_rate_limits(checks: list[tuple[str, int, int]]) -> None:
+    allowed = limiter.check_many(checks)
+    # The Redis limiter is async so a slow Redis never blocks the event loop.
+    if inspect.isawaitable(allowed):
+        allowed = await allowed
+    if allowed:
         return
     raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="rate limit exceeded")
 
 
 def service_headers(target_service: str, extra_headers: dict[str, str] | None = None) -> dict[str, str]:
-    headers = {"X-Service-Token": create_service_token(API_GATEWAY_SERVICE_NAME, target_service)}
+    headers = {"X-Service-Token": service_token(API_GATEWAY_SERVICE_NAME, target_service)}
     if extra_headers:
         headers.update(extra_headers)
     return headers
 
 
+async def call_upstream(
+    target_service: str,
+    method: str,
+    path: str,
+    extra_headers: dict[str, str] | None = None,
+    upstream: str | None = None,
+    **kwargs,
+) -> httpx.Response:
+    return await upstreams.request(
+        upstream or target_service,
+        method,
+        path,
+        headers=service_headers(target_service, extra_headers),
+        **kwargs,
+    )
+
+
+async def stream_upstream(
+    target_service: str,
+    method: str,
+    path: str,
+    upstream: str | None = None,
+    **kwargs,
+) -> StreamingResponse:
+    # Upstream errors are raised before any bytes are sent; the upstream connection is
+    # held only for as long as the client keeps reading.
+    stack = AsyncExitStack()
+    r = await stack.enter_async_context(
+        upstreams.stream(upstream or target_service, method, path, headers=service_headers(target_service), **kwargs)
+    )
+    if r.status_code >= 400:
+        await r.aread()
+        await stack.aclose()
+        raise HTTPException(status_code=r.status_code, detail=r.json())
+
+    async def body():
+        try:
+            async for chunk in r.aiter_raw():
+                yield chunk
+        finally:
+            await stack.aclose()
+
+    return StreamingResponse(
+        body(),
+        media_type=r.headers.get("content-type"),
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 def set_refresh_cookie(response: Response, refresh_token: str) -> None:
     response.set_cookie(
         key=REFRESH_COOKIE_NAME,
@@ -154,13 +307,8 @@ def health() -> dict[str, str]:
 @app.post("/auth/signup")
 async def signup(payload: SignUpRequest, request: Request):
     ip = request_ip(request)
-    enforce_rate_limit(f"signup:ip:{ip}", SIGNUP_IP_LIMIT, 3600)
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.post(
-            f"{AUTH_SERVICE_URL}/internal/signup",
-            json=payload.model_dump(),
-            headers=service_headers("auth-service"),
-        )
+    await enforce_rate_limit(f"signup:ip:{ip}", SIGNUP_IP_LIMIT, 3600)
+    r = await call_upstream("auth-service", "POST", "/internal/signup", json=payload.model_dump())
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     return r.json()
@@ -168,12 +316,7 @@ async def signup(payload: SignUpRequest, request: Request):
 
 @app.post("/auth/verify-email")
 async def verify_email(payload: VerifyEmailRequest):
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.post(
-            f"{AUTH_SERVICE_URL}/internal/verify-email",
-            json=payload.model_dump(),
-            headers=service_headers("auth-service"),
-        )
+    r = await call_upstream("auth-service", "POST", "/internal/verify-email", json=payload.model_dump())
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     return r.json()
@@ -182,14 +325,13 @@ async def verify_email(payload: VerifyEmailRequest):
 @app.post("/auth/signin")
 async def signin(payload: SignInRequest, request: Request, response: Response):
     ip = request_ip(request)
-    enforce_rate_limit(f"signin:ip:{ip}", SIGNIN_IP_LIMIT, 60)
-    enforce_rate_limit(f"signin:email:{payload.email.lower()}", SIGNIN_EMAIL_LIMIT, 60)
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.post(
-            f"{AUTH_SERVICE_URL}/internal/signin",
-            json=payload.model_dump(),
-            headers=service_headers("auth-service"),
-        )
+    await enforce_rate_limits(
+        [
+            (f"signin:ip:{ip}", SIGNIN_IP_LIMIT, 60),
+            (f"signin:email:{payload.email.lower()}", SIGNIN_EMAIL_LIMIT, 60),
+        ]
+    )
+    r = await call_upstream("auth-service", "POST", "/internal/signin", json=payload.model_dump())
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     data = r.json()
@@ -208,12 +350,7 @@ async def refresh(
     refresh_token = refresh_cookie or (payload.refresh_token if payload else None)
     if not refresh_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="missing refresh token")
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.post(
-            f"{AUTH_SERVICE_URL}/internal/refresh",
-            json={"refresh_token": refresh_token},
-            headers=service_headers("auth-service"),
-        )
+    r = await call_upstream("auth-service", "POST", "/internal/refresh", json={"refresh_token": refresh_token})
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     data = r.json()
@@ -229,12 +366,7 @@ async def logout(
     refresh_cookie: str | None = Cookie(default=None, alias=REFRESH_COOKIE_NAME),
 ):
     if refresh_cookie:
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.post(
-                f"{AUTH_SERVICE_URL}/internal/logout",
-                json={"refresh_token": refresh_cookie},
-                headers=service_headers("auth-service"),
-            )
+        r = await call_upstream("auth-service", "POST", "/internal/logout", json={"refresh_token": refresh_cookie})
         if r.status_code >= 400:
             raise HTTPException(status_code=r.status_code, detail=r.json())
     clear_refresh_cookie(response)
@@ -243,11 +375,7 @@ async def logout(
 
 @app.get("/auth/google/login")
 async def google_login():
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(
-            f"{AUTH_SERVICE_URL}/internal/oauth/google/login",
-            headers=service_headers("auth-service"),
-        )
+    r = await call_upstream("auth-service", "GET", "/internal/oauth/google/login")
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     return r.json()
@@ -255,12 +383,12 @@ async def google_login():
 
 @app.get("/auth/google/callback")
 async def google_callback(code: str, state: str, response: Response):
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(
-            f"{AUTH_SERVICE_URL}/internal/oauth/google/callback",
-            params={"code": code, "state": state},
-            headers=service_headers("auth-service"),
-        )
+    r = await call_upstream(
+        "auth-service",
+        "GET",
+        "/internal/oauth/google/callback",
+        params={"code": code, "state": state},
+    )
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     data = r.json()
@@ -271,15 +399,21 @@ async def google_callback(code: str, state: str, response: Response):
 
 
 @app.get("/songs/search")
-async def search(q: str, claims: dict = Depends(bearer_token_dep)):
-    enforce_rate_limit(f"search:user:{claims.get('sub')}", SEARCH_USER_LIMIT, 60)
+async def search(q: str, stream: bool = False, claims: dict = Depends(bearer_token_dep)):
+    await enforce_rate_limit(f"search:user:{claims.get('sub')}", SEARCH_USER_LIMIT, 60)
     req = {"query": q, "user_id": claims.get("sub")}
-    async with httpx.AsyncClient(timeout=60) as client:
-        r = await client.post(
-            f"{SEARCH_SERVICE_URL}/internal/search",
-            json=req,
-            headers=service_headers("search-service"),
-        )
+    if stream:
+        return await stream_upstream("search-service", "POST", "/internal/search/stream", json=req)
+    r = await call_upstream("search-service", "POST", "/internal/search", json=req)
+    if r.status_code >= 400:
+        raise HTTPException(status_code=r.status_code, detail=r.json())
+    return r.json()
+
+
+@app.get("/songs/suggest")
+async def suggest(prefix: str, claims: dict = Depends(bearer_token_dep)):
+    await enforce_rate_limit(f"suggest:user:{claims.get('sub')}", SUGGEST_USER_LIMIT, 60)
+    r = await call_upstream("search-service", "GET", "/internal/suggest", params={"prefix": prefix})
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     return r.json()
@@ -287,7 +421,7 @@ async def search(q: str, claims: dict = Depends(bearer_token_dep)):
 
 @app.post("/songs/import")
 async def import_song(payload: ImportSongRequest, claims: dict = Depends(bearer_token_dep)):
-    enforce_rate_limit(f"import:user:{claims.get('sub')}", IMPORT_USER_LIMIT, 3600)
+    await enforce_rate_limit(f"import:user:{claims.get('sub')}", IMPORT_USER_LIMIT, 3600)
     req = {
         "user_id": claims.get("sub"),
         "source_provider": payload.source_provider,
@@ -296,12 +430,7 @@ async def import_song(payload: ImportSongRequest, claims: dict = Depends(bearer_
         "artist": payload.artist,
         "candidate_meta": payload.candidate_meta,
     }
-    async with httpx.AsyncClient(timeout=60) as client:
-        r = await client.post(
-            f"{DOWNLOAD_SERVICE_URL}/internal/jobs",
-            json=req,
-            headers=service_headers("download-service"),
-        )
+    r = await call_upstream("download-service", "POST", "/internal/jobs", json=req)
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     return r.json()
@@ -310,11 +439,7 @@ async def import_song(payload: ImportSongRequest, claims: dict = Depends(bearer_
 @app.get("/library")
 async def library(claims: dict = Depends(bearer_token_dep)):
     user_id = claims.get("sub")
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(
-            f"{CATALOG_SERVICE_URL}/internal/library/{user_id}",
-            headers=service_headers("catalog-service"),
-        )
+    r = await call_upstream("catalog-service", "GET", f"/internal/library/{user_id}")
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     return r.json()
@@ -323,12 +448,7 @@ async def library(claims: dict = Depends(bearer_token_dep)):
 @app.get("/stream/{song_id}")
 async def stream(song_id: str, claims: dict = Depends(bearer_token_dep)):
     user_id = claims.get("sub")
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(
-            f"{STREAM_SERVICE_URL}/internal/stream-url/{song_id}",
-            params={"user_id": user_id},
-            headers=service_headers("stream-service"),
-        )
+    r = await call_upstream("stream-service", "GET", f"/internal/stream-url/{song_id}", params={"user_id": user_id})
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     stream_url = r.json().get("stream_url")
@@ -338,26 +458,57 @@ async def stream(song_id: str, claims: dict = Depends(bearer_token_dep)):
 
 
 @app.get("/jobs/{job_id}")
-async def job_status(job_id: str, claims: dict = Depends(bearer_token_dep)):
+async def job_status(job_id: str, wait: float = Query(default=0, ge=0, le=30), claims: dict = Depends(bearer_token_dep)):
     user_id = claims.get("sub")
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(
-            f"{DOWNLOAD_SERVICE_URL}/internal/jobs/{job_id}",
-            params={"user_id": user_id},
-            headers=service_headers("download-service"),
+    if wait:
+        # Long-polls hold their connection like SSE does, so they share the events pool and
+        # cannot starve imports and plain job reads on the regular download-service pool.
+        r = await call_upstream(
+            "download-service",
+            "GET",
+            f"/internal/jobs/{job_id}",
+            upstream="download-events",
+            params={"user_id": user_id, "wait": wait},
         )
+    else:
+        r = await call_upstream("download-service", "GET", f"/internal/jobs/{job_id}", params={"user_id": user_id})
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     return r.json()
 
 
+@app.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str, claims: dict = Depends(bearer_token_dep)):
+    r = await call_upstream(
+        "download-service",
+        "POST",
+        f"/internal/jobs/{job_id}/retry",
+        params={"user_id": claims.get("sub")},
+    )
+    if r.status_code >= 400:
+        raise HTTPException(status_code=r.status_code, detail=r.json())
+    return r.json()
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, claims: dict = Depends(bearer_token_dep)):
+    return await stream_upstream(
+        "download-service",
+        "GET",
+        f"/internal/jobs/{job_id}/events",
+        upstream="download-events",
+        params={"user_id": claims.get("sub")},
+    )
+
+
 @app.get("/admin/users")
 async def admin_users(_: dict = Depends(require_admin), authorization: str | None = Header(default=None, alias="Authorization")):
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(
-            f"{ADMIN_SERVICE_URL}/internal/admin/users",
-            headers=service_headers("admin-service", {"Authorization": authorization or ""}),
-        )
+    r = await call_upstream(
+        "admin-service",
+        "GET",
+        "/internal/admin/users",
+        extra_headers={"Authorization": authorization or ""},
+    )
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     return r.json()
@@ -365,11 +516,12 @@ async def admin_users(_: dict = Depends(require_admin), authorization: str | Non
 
 @app.get("/admin/songs")
 async def admin_songs(_: dict = Depends(require_admin), authorization: str | None = Header(default=None, alias="Authorization")):
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(
-            f"{ADMIN_SERVICE_URL}/internal/admin/songs",
-            headers=service_headers("admin-service", {"Authorization": authorization or ""}),
-        )
+    r = await call_upstream(
+        "admin-service",
+        "GET",
+        "/internal/admin/songs",
+        extra_headers={"Authorization": authorization or ""},
+    )
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     return r.json()
@@ -377,14 +529,12 @@ async def admin_songs(_: dict = Depends(require_admin), authorization: str | Non
 
 @app.get("/admin/jobs")
 async def admin_jobs(_: dict = Depends(require_admin), authorization: str | None = Header(default=None, alias="Authorization")):
-    async with httpx.AsyncClient(timeout=30) as client:
-        r = await client.get(
-            f"{ADMIN_SERVICE_URL}/internal/admin/jobs",
-            headers=service_headers("admin-service", {"Authorization": authorization or ""}),
-        )
+    r = await call_upstream(
+        "admin-service",
+        "GET",
+        "/internal/admin/jobs",
+        extra_headers={"Authorization": authorization or ""},
+    )
     if r.status_code >= 400:
         raise HTTPException(status_code=r.status_code, detail=r.json())
     return r.json()
-
-
-
@@ -0,0 +1,118 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+import httpx
+from prometheus_client import REGISTRY, Gauge
+from prometheus_client.core import GaugeMetricFamily
+
+UPSTREAM_IN_FLIGHT = Gauge(
+    "gateway_upstream_in_flight_requests",
+    "Proxied requests currently waiting on an upstream",
+    ["upstream"],
+)
+
+
+@dataclass(frozen=True)
+class UpstreamConfig:
+    name: str
+    base_url: str
+    timeout_seconds: float
+    connect_timeout_seconds: float
+    max_connections: int
+    max_keepalive_connections: int
+    keepalive_expiry_seconds: float
+    http2: bool = False
+
+
+class UpstreamPool:
+    def __init__(self, configs: list[UpstreamConfig]) -> None:
+        self._configs = {c.name: c for c in configs}
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._transports: dict[str, httpx.AsyncHTTPTransport] = {}
+
+    async def start(self) -> None:
+        for name, cfg in self._configs.items():
+            limits = httpx.Limits(
+                max_connections=cfg.max_connections,
+                max_keepalive_connections=cfg.max_keepalive_connections,
+                keepalive_expiry=cfg.keepalive_expiry_seconds,
+            )
+            transport = httpx.AsyncHTTPTransport(limits=limits, http2=cfg.http2)
+            self._transports[name] = transport
+            self._clients[name] = httpx.AsyncClient(
+                base_url=cfg.base_url,
+                transport=transport,
+                timeout=httpx.Timeout(cfg.timeout_seconds, connect=cfg.connect_timeout_seconds),
+            )
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        self._transports.clear()
+        for client in clients:
+            await client.aclose()
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None:
+            raise RuntimeError(f"upstream client {name!r} is not started")
+        return client
+
+    async def request(self, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        gauge = UPSTREAM_IN_FLIGHT.labels(name)
+        gauge.inc()
+        try:
+            return await self.client(name).request(method, url, **kwargs)
+        finally:
+            gauge.dec()
+
+    @asynccontextmanager
+    async def stream(self, name: str, method: str, url: str, **kwargs):
+        gauge = UPSTREAM_IN_FLIGHT.labels(name)
+        gauge.inc()
+        try:
+            async with self.client(name).stream(method, url, **kwargs) as response:
+                yield response
+        finally:
+            gauge.dec()
+
+    def pool_stats(self) -> dict[str, dict[str, int]]:
+        stats: dict[str, dict[str, int]] = {}
+        for name, transport in self._transports.items():
+            # httpx does not expose its httpcore pool publicly; report zeros if that ever changes.
+            pool = getattr(transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []) or [])
+            idle = sum(1 for conn in connections if conn.is_idle())
+            stats[name] = {
+                "active": len(connections) - idle,
+                "idle": idle,
+                "max": self._configs[name].max_connections,
+            }
+        return stats
+
+
+class UpstreamPoolCollector:
+    def __init__(self, pool: UpstreamPool) -> None:
+        self._pool = pool
+
+    def collect(self):
+        connections = GaugeMetricFamily(
+            "gateway_upstream_pool_connections",
+            "Upstream keep-alive pool connections by state",
+            labels=["upstream", "state"],
+        )
+        limit = GaugeMetricFamily(
+            "gateway_upstream_pool_max_connections",
+            "Configured upstream connection limit",
+            labels=["upstream"],
+        )
+        for name, stats in self._pool.pool_stats().items():
+            connections.add_metric([name, "active"], stats["active"])
+            connections.add_metric([name, "idle"], stats["idle"])
+            limit.add_metric([name], stats["max"])
+        yield connections
+        yield limit
+
+
+def register_pool_metrics(pool: UpstreamPool) -> None:
+    REGISTRY.register(UpstreamPoolCollector(pool))
@@ -0,0 +1,27 @@
+"""song search trigram index
+
+Revision ID: 0002_song_search_index
+Revises: 0001_initial
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = "0002_song_search_index"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Must match packages.shared.catalog_search.SEARCH_DOCUMENT so the planner can use it.
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_songs_search_trgm ON songs USING gin "
+        "((lower(artist || ' ' || title || ' ' || coalesce(source_channel, ''))) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_songs_search_trgm")
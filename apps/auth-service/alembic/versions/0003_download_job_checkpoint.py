@@ -0,0 +1,34 @@
+"""download job stage checkpoint
+
+Revision ID: 0003_download_job_checkpoint
+Revises: 0002_song_search_index
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+revision = "0003_download_job_checkpoint"
+down_revision = "0002_song_search_index"
+branch_labels = None
+depends_on = None
+
+
+def _has_column(inspector, table_name: str, column_name: str) -> bool:
+    return any(col["name"] == column_name for col in inspector.get_columns(table_name))
+
+
+def upgrade() -> None:
+    # DB_AUTO_CREATE may already have created the columns from the models.
+    inspector = inspect(op.get_bind())
+    if not _has_column(inspector, "download_jobs", "stage"):
+        op.add_column("download_jobs", sa.Column("stage", sa.String(length=20), nullable=True))
+    if not _has_column(inspector, "download_jobs", "checkpoint"):
+        op.add_column("download_jobs", sa.Column("checkpoint", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("download_jobs", "checkpoint")
+    op.drop_column("download_jobs", "stage")
@@ -0,0 +1,23 @@
+"""normalise song codec to aac
+
+Revision ID: 0004_song_codec_aac
+Revises: 0003_download_job_checkpoint
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = "0004_song_codec_aac"
+down_revision = "0003_download_job_checkpoint"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Passthrough/remux imports stored the yt-dlp profile string (mp4a.40.2); every stored song is AAC.
+    op.execute("UPDATE songs SET codec = 'aac' WHERE codec LIKE 'mp4a%'")
+
+
+def downgrade() -> None:
+    pass
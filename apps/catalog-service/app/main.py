@@ -6,7 +6,7 @@ from sqlalchemy import and_, select
 from sqlalchemy.orm import Session
 
 from packages.shared.db import make_engine, make_session_local
-from packages.shared.internal_auth import decode_service_token
+from packages.shared.internal_auth import verify_service_token
 from packages.shared.models import Song, UserSong
 from packages.shared.schemas import SongOut
 from packages.shared.security import validate_security_runtime
@@ -52,7 +52,7 @@ def internal_service_dep(x_service_token: str | None = Header(default=None, alia
     if not x_service_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="missing internal service token")
     try:
-        return decode_service_token(x_service_token, SERVICE_NAME)
+        return verify_service_token(x_service_token, SERVICE_NAME)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
 
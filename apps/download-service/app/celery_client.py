@@ -1,7 +1,11 @@
 import os
 from celery import Celery
+from celery.signals import before_task_publish
+
+from packages.shared.task_queue import stamp_enqueued_at
 
 broker_url = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 result_backend = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
 
 celery_client = Celery("download-service", broker=broker_url, backend=result_backend)
+before_task_publish.connect(stamp_enqueued_at)
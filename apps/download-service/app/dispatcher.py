@@ -0,0 +1,112 @@
+import asyncio
+import time
+from collections.abc import Callable
+
+import redis
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from redis.exceptions import RedisError
+from starlette.concurrency import run_in_threadpool
+
+from packages.shared.fair_queue import FairQueue
+from packages.shared.task_queue import broker_lists
+
+IMPORT_DISPATCHED = Counter("import_dispatch_total", "Import jobs handed to the worker pool", ["lane"])
+IMPORT_FAIR_WAIT = Histogram(
+    "import_fair_queue_wait_seconds",
+    "Time an import waited in its user's fair-share queue",
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+
+class FairShareDispatcher:
+    # Jobs are released to Celery only while the pipeline's ingress backlog is short, so the
+    # order in which work starts is decided here (round-robin across users), not by Celery's FIFO.
+    def __init__(
+        self,
+        fair_queue: FairQueue,
+        send: Callable[[dict], None],
+        broker_url: str,
+        backlog_queues: list[str],
+        max_backlog: int,
+        interval_seconds: float,
+    ) -> None:
+        self._fair_queue = fair_queue
+        self._send = send
+        self._broker = redis.Redis.from_url(broker_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._backlog_keys = [key for queue in backlog_queues for key in broker_lists(queue)]
+        self._max_backlog = max_backlog
+        self._interval_seconds = interval_seconds
+
+    def broker_backlog(self) -> int | None:
+        try:
+            pipe = self._broker.pipeline(transaction=False)
+            for key in self._backlog_keys:
+                pipe.llen(key)
+            return sum(pipe.execute())
+        except RedisError:
+            return None
+
+    def dispatch_once(self) -> int:
+        backlog = self.broker_backlog()
+        if backlog is None:
+            return 0
+        popped = self._fair_queue.pop(self._max_backlog - backlog)
+        for n, (user_id, item) in enumerate(popped):
+            enqueued_at = item.pop("enqueued_at", None)
+            try:
+                self._send(item)
+            except Exception:
+                # Put this and the rest back (keeping their enqueue time) and retry next tick.
+                if enqueued_at is not None:
+                    item["enqueued_at"] = enqueued_at
+                for retry_user_id, retry_item in popped[n:]:
+                    self._fair_queue.push(retry_user_id, retry_item)
+                return n
+            IMPORT_DISPATCHED.labels("fair").inc()
+            if enqueued_at is not None:
+                IMPORT_FAIR_WAIT.observe(max(0.0, time.time() - enqueued_at))
+        return len(popped)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                dispatched = await run_in_threadpool(self.dispatch_once)
+            except Exception:
+                dispatched = 0
+            if dispatched == 0:
+                await asyncio.sleep(self._interval_seconds)
+
+
+class FairQueueCollector:
+    # Per-user series only for the deepest queues: a label per user would be unbounded.
+    def __init__(self, fair_queue: FairQueue, top_users: int) -> None:
+        self._fair_queue = fair_queue
+        self._top_users = top_users
+
+    def collect(self):
+        backlog = self._fair_queue.backlog()
+        now = time.time()
+        total = GaugeMetricFamily("import_fair_queue_depth", "Imports waiting for dispatch across all users")
+        users = GaugeMetricFamily("import_fair_queue_users", "Users with imports waiting for dispatch")
+        user_depth = GaugeMetricFamily(
+            "import_fair_queue_user_depth",
+            "Waiting imports for the users with the deepest queues",
+            labels=["user_id"],
+        )
+        user_wait = GaugeMetricFamily(
+            "import_fair_queue_user_oldest_wait_seconds",
+            "Age of the oldest waiting import for the users with the deepest queues",
+            labels=["user_id"],
+        )
+        total.add_metric([], sum(depth for depth, _ in backlog.values()))
+        users.add_metric([], len(backlog))
+        deepest = sorted(backlog.items(), key=lambda entry: entry[1][0], reverse=True)[: self._top_users]
+        for user_id, (depth, oldest) in deepest:
+            user_depth.add_metric([user_id], depth)
+            if oldest is not None:
+                user_wait.add_metric([user_id], max(0.0, now - oldest))
+        yield total
+        yield users
+        yield user_depth
+        yield user_wait
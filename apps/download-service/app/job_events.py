@@ -0,0 +1,95 @@
+import asyncio
+import json
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import redis.asyncio as redis_asyncio
+from prometheus_client import Counter, Gauge
+from redis.exceptions import RedisError
+
+from packages.shared.job_progress import EVENTS_CHANNEL_PREFIX
+
+JOB_EVENT_WAITERS = Gauge("download_job_event_waiters", "Requests currently waiting on job events")
+JOB_EVENT_RECONNECTS = Counter("download_job_event_reconnects_total", "Job event subscription reconnects")
+
+# Queued in place of an event when notifications may have been missed; waiters re-read the job.
+RESYNC = None
+
+
+class JobEventHub:
+    # One pattern subscription per process fans worker notifications out to in-memory queues,
+    # so a waiting client costs a queue, not a Redis connection or a Postgres poll.
+    def __init__(
+        self,
+        url: str,
+        queue_size: int = 64,
+        retry_seconds: float = 0.5,
+        max_retry_seconds: float = 30.0,
+    ) -> None:
+        self._url = url
+        self._queue_size = queue_size
+        self._retry_seconds = retry_seconds
+        self._max_retry_seconds = max_retry_seconds
+        self._waiters: dict[str, set[asyncio.Queue]] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._waiters.setdefault(job_id, set()).add(queue)
+        JOB_EVENT_WAITERS.inc()
+        try:
+            yield queue
+        finally:
+            JOB_EVENT_WAITERS.dec()
+            waiters = self._waiters.get(job_id)
+            if waiters is not None:
+                waiters.discard(queue)
+                if not waiters:
+                    del self._waiters[job_id]
+
+    def _dispatch(self, job_id: str, event: dict | None) -> None:
+        for queue in self._waiters.get(job_id, ()):
+            if queue.full():
+                # A slow reader loses the oldest tick, never the latest one.
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _run(self) -> None:
+        delay = self._retry_seconds
+        while True:
+            client = redis_asyncio.Redis.from_url(self._url, decode_responses=True)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(EVENTS_CHANNEL_PREFIX + "*")
+                delay = self._retry_seconds
+                for job_id in list(self._waiters):
+                    self._dispatch(job_id, RESYNC)
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    try:
+                        event = json.loads(message["data"])
+                    except ValueError:
+                        continue
+                    self._dispatch(message["channel"].removeprefix(EVENTS_CHANNEL_PREFIX), event)
+            except (RedisError, OSError):
+                JOB_EVENT_RECONNECTS.inc()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self._max_retry_seconds)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
@@ -1,27 +1,75 @@
+import asyncio
 import json
 import os
+from contextlib import ExitStack, asynccontextmanager
 from uuid import uuid4
 
-from fastapi import Depends, FastAPI, Header, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from prometheus_client import REGISTRY
 from pydantic import BaseModel, Field
-from sqlalchemy import and_, select
+from sqlalchemy import and_, select, update
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.celery_client import celery_client
+from app.celery_client import broker_url, celery_client
+from app.dispatcher import IMPORT_DISPATCHED, FairQueueCollector, FairShareDispatcher
+from app.job_events import RESYNC, JobEventHub
 from packages.shared.db import make_engine, make_session_local
-from packages.shared.internal_auth import decode_service_token
-from packages.shared.models import DownloadJob
+from packages.shared.fair_queue import FairQueue
+from packages.shared.import_coalescing import ImportCoalescer
+from packages.shared.internal_auth import verify_service_token
+from packages.shared.job_progress import JobProgress
+from packages.shared.models import DownloadJob, Song
 from packages.shared.schemas import JobOut
 from packages.shared.security import validate_security_runtime
 
 
-app = FastAPI(title="download-service")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    job_events.start()
+    dispatcher_task = asyncio.create_task(dispatcher.run()) if IMPORT_FAIR_SHARE else None
+    try:
+        yield
+    finally:
+        if dispatcher_task is not None:
+            dispatcher_task.cancel()
+        await job_events.aclose()
+
+
+app = FastAPI(title="download-service", lifespan=lifespan)
 from packages.shared.observability import register_observability
 register_observability(app, app.title)
 validate_security_runtime()
 engine = make_engine()
 SessionLocal = make_session_local()
 SERVICE_NAME = os.getenv("DOWNLOAD_SERVICE_NAME", "download-service")
+JOB_PROGRESS_REDIS_URL = os.getenv("JOB_PROGRESS_REDIS_URL", broker_url)
+JOB_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("JOB_EVENTS_HEARTBEAT_SECONDS", "15"))
+JOB_WAIT_MAX_SECONDS = float(os.getenv("JOB_WAIT_MAX_SECONDS", "30"))
+TERMINAL_STATUSES = {"completed", "failed"}
+IMPORT_TASK_NAME = "app.worker.process_import_job"
+IMPORT_FAIR_SHARE = os.getenv("IMPORT_FAIR_SHARE", "1").lower() in {"1", "true", "yes", "on"}
+IMPORT_FAIR_QUEUE_REDIS_URL = os.getenv("IMPORT_FAIR_QUEUE_REDIS_URL", broker_url)
+IMPORT_DISPATCH_QUEUES = [q.strip() for q in os.getenv("IMPORT_DISPATCH_QUEUES", "celery,download").split(",") if q.strip()]
+IMPORT_DISPATCH_MAX_BACKLOG = int(os.getenv("IMPORT_DISPATCH_MAX_BACKLOG", "16"))
+IMPORT_DISPATCH_INTERVAL_SECONDS = float(os.getenv("IMPORT_DISPATCH_INTERVAL_SECONDS", "0.5"))
+IMPORT_PRIORITY_QUEUE = os.getenv("IMPORT_PRIORITY_QUEUE", "imports-priority")
+IMPORT_FAIR_METRICS_TOP_USERS = int(os.getenv("IMPORT_FAIR_METRICS_TOP_USERS", "10"))
+IMPORT_COALESCING_REDIS_URL = os.getenv("IMPORT_COALESCING_REDIS_URL", broker_url)
+job_progress = JobProgress(JOB_PROGRESS_REDIS_URL)
+job_events = JobEventHub(JOB_PROGRESS_REDIS_URL)
+coalescer = ImportCoalescer(IMPORT_COALESCING_REDIS_URL, socket_timeout=0.25)
+fair_queue = FairQueue(IMPORT_FAIR_QUEUE_REDIS_URL)
+dispatcher = FairShareDispatcher(
+    fair_queue,
+    lambda kwargs: celery_client.send_task(IMPORT_TASK_NAME, kwargs=kwargs),
+    broker_url,
+    IMPORT_DISPATCH_QUEUES,
+    IMPORT_DISPATCH_MAX_BACKLOG,
+    IMPORT_DISPATCH_INTERVAL_SECONDS,
+)
+REGISTRY.register(FairQueueCollector(fair_queue, IMPORT_FAIR_METRICS_TOP_USERS))
 
 
 def db_dep():
@@ -45,7 +93,7 @@ def internal_service_dep(x_service_token: str | None = Header(default=None, alia
     if not x_service_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="missing internal service token")
     try:
-        return decode_service_token(x_service_token, SERVICE_NAME)
+        return verify_service_token(x_service_token, SERVICE_NAME)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
 
@@ -79,9 +127,9 @@ def create_job(
     db.commit()
     db.refresh(job)
 
-    celery_client.send_task(
-        "app.worker.process_import_job",
-        kwargs={
+    dispatch_import(
+        db,
+        {
             "job_id": job.id,
             "user_id": payload.user_id,
             "source_provider": payload.source_provider,
@@ -94,19 +142,151 @@ def create_job(
     return job
 
 
-@app.get("/internal/jobs/{job_id}", response_model=JobOut)
-def get_job(
+@app.post("/internal/jobs/{job_id}/retry", response_model=JobOut)
+def retry_job(
     job_id: str,
     user_id: str,
     _: dict = Depends(internal_service_dep),
     db: Session = Depends(db_dep),
 ) -> DownloadJob:
+    # Only a failed job is reopened. The worker resumes it after its last checkpointed stage.
+    reopened = db.execute(
+        update(DownloadJob)
+        .where(and_(DownloadJob.id == job_id, DownloadJob.user_id == user_id, DownloadJob.status == "failed"))
+        .values(status="queued", failure_reason=None)
+    ).rowcount
     job = db.scalar(select(DownloadJob).where(and_(DownloadJob.id == job_id, DownloadJob.user_id == user_id)))
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    if not reopened:
+        raise HTTPException(status_code=409, detail="only failed jobs can be retried")
+    db.commit()
+    db.refresh(job)
+    job_progress.publish(job.id, "queued", force=True)
+    meta = json.loads(job.candidate_meta or "{}")
+    title, artist = meta.pop("title", None), meta.pop("artist", None)
+    dispatch_import(
+        db,
+        {
+            "job_id": job.id,
+            "user_id": job.user_id,
+            "source_provider": job.source_provider,
+            "source_video_id": job.source_id,
+            "title": title,
+            "artist": artist,
+            "candidate_meta": meta,
+        },
+    )
+    return job
+
+
+def dispatch_import(db: Session, task_kwargs: dict) -> None:
+    if needs_no_download(db, task_kwargs["source_provider"], task_kwargs["source_video_id"]):
+        celery_client.send_task(IMPORT_TASK_NAME, kwargs=task_kwargs, queue=IMPORT_PRIORITY_QUEUE)
+        IMPORT_DISPATCHED.labels("priority").inc()
+    elif not (IMPORT_FAIR_SHARE and fair_queue.push(task_kwargs["user_id"], task_kwargs)):
+        celery_client.send_task(IMPORT_TASK_NAME, kwargs=task_kwargs)
+        IMPORT_DISPATCHED.labels("direct").inc()
+
+
+def needs_no_download(db: Session, source_provider: str, source_id: str) -> bool:
+    # Catalogued songs only need an ownership row, and sources with a running import only
+    # join its followers: neither should wait behind other users' downloads.
+    song_id = db.scalar(
+        select(Song.id).where(and_(Song.source_provider == source_provider, Song.source_id == source_id))
+    )
+    return song_id is not None or coalescer.leader(source_provider, source_id) is not None
+
+
+def load_job(job_id: str, user_id: str) -> JobOut | None:
+    # A short-lived session per read: waiting requests must not hold a pooled DB connection.
+    with SessionLocal() as db:
+        job = db.scalar(select(DownloadJob).where(and_(DownloadJob.id == job_id, DownloadJob.user_id == user_id)))
+        if job is None:
+            return None
+        out = JobOut.model_validate(job)
+    # Live progress comes from Redis; it is absent once the hash expires or if Redis is down.
+    return out.model_copy(update={"progress": job_progress.read(job_id)})
+
+
+async def job_snapshot(job_id: str, user_id: str) -> JobOut:
+    job = await run_in_threadpool(load_job, job_id, user_id)
     if job is None:
         raise HTTPException(status_code=404, detail="job not found")
     return job
 
 
+def job_stage(job: JobOut) -> str | None:
+    return (job.progress or {}).get("stage")
+
+
+def sse(event: str, data: str) -> bytes:
+    return f"event: {event}\ndata: {data}\n\n".encode("utf-8")
+
+
+@app.get("/internal/jobs/{job_id}", response_model=JobOut)
+async def get_job(
+    job_id: str,
+    user_id: str,
+    wait: float = Query(default=0, ge=0),
+    _: dict = Depends(internal_service_dep),
+) -> JobOut:
+    # With ?wait=N the response is held until the job changes stage (or N seconds pass).
+    with job_events.subscribe(job_id) as events:
+        job = await job_snapshot(job_id, user_id)
+        if wait <= 0 or job.status in TERMINAL_STATUSES:
+            return job
+        stage = job_stage(job)
+        deadline = asyncio.get_running_loop().time() + min(wait, JOB_WAIT_MAX_SECONDS)
+        while (remaining := deadline - asyncio.get_running_loop().time()) > 0:
+            try:
+                event = await asyncio.wait_for(events.get(), remaining)
+            except TimeoutError:
+                break
+            if event is RESYNC or event.get("stage") != stage:
+                return await job_snapshot(job_id, user_id)
+        return job
+
 
+@app.get("/internal/jobs/{job_id}/events")
+async def job_events_stream(
+    job_id: str,
+    user_id: str,
+    _: dict = Depends(internal_service_dep),
+) -> StreamingResponse:
+    # Subscribed before the first read so nothing published in between is lost.
+    stack = ExitStack()
+    events = stack.enter_context(job_events.subscribe(job_id))
+    try:
+        job = await job_snapshot(job_id, user_id)
+    except HTTPException:
+        stack.close()
+        raise
 
+    async def body():
+        current = job
+        try:
+            yield b"retry: 3000\n\n"
+            yield sse("job", current.model_dump_json())
+            while current.status not in TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(events.get(), JOB_EVENTS_HEARTBEAT_SECONDS)
+                except TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if event is not RESYNC and event.get("stage") == job_stage(current):
+                    yield sse("progress", json.dumps(event))
+                    continue
+                # Stage changes (and missed notifications) re-read the job so status is authoritative.
+                current = await run_in_threadpool(load_job, job_id, user_id)
+                if current is None:
+                    break
+                yield sse("job", current.model_dump_json())
+        finally:
+            stack.close()
 
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
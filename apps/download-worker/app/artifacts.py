@@ -0,0 +1,181 @@
+import shutil
+import time
+from pathlib import Path
+from typing import BinaryIO, Callable
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+from packages.shared.storage import MultipartUpload, object_exists
+
+ARTIFACT_LIFECYCLE_RULE_ID = "expire-import-artifacts"
+
+
+class LocalUpload:
+    def __init__(self, target: Path, on_part: Callable[[int, int], None] | None = None) -> None:
+        self._target = target
+        self._partial = target.with_name(target.name + ".part")
+        self._on_part = on_part
+
+    def write_from(self, stream: BinaryIO) -> int:
+        self._target.parent.mkdir(parents=True, exist_ok=True)
+        with self._partial.open("wb") as out:
+            shutil.copyfileobj(stream, out, 1024 * 1024)
+        written = self._partial.stat().st_size
+        if self._on_part is not None:
+            self._on_part(1, written)
+        return written
+
+    def complete(self) -> None:
+        self._partial.replace(self._target)
+
+    def abort(self) -> None:
+        self._partial.unlink(missing_ok=True)
+
+
+class LocalArtifactStore:
+    # Only usable when every stage worker shares the same filesystem (single host / shared volume).
+    def __init__(self, root: str) -> None:
+        self._root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self._root / key
+
+    def put(self, source: Path, key: str) -> str:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, target)
+        return key
+
+    def put_bytes(self, key: str, data: bytes, content_type: str | None = None) -> None:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(target.name + ".part")
+        partial.write_bytes(data)
+        partial.replace(target)
+
+    def get_bytes(self, key: str) -> bytes | None:
+        try:
+            return self._path(key).read_bytes()
+        except OSError:
+            return None
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def expire(self, ttl_seconds: int) -> None:
+        cutoff = time.time() - ttl_seconds
+        for path in self._root.rglob("*") if self._root.is_dir() else ():
+            try:
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+    def source_url(self, key: str) -> str:
+        return str(self._path(key))
+
+    def open_upload(self, key: str, content_type: str | None = None, on_part=None) -> LocalUpload:
+        return LocalUpload(self._path(key), on_part)
+
+    def publish(self, key: str, s3, bucket: str, storage_key: str, content_type: str) -> None:
+        s3.upload_file(str(self._path(key)), bucket, storage_key, ExtraArgs={"ContentType": content_type})
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        path.unlink(missing_ok=True)
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass
+
+
+class S3ArtifactStore:
+    def __init__(self, s3, bucket: str, transfer_config: TransferConfig, prefix: str = "artifacts/") -> None:
+        self._s3 = s3
+        self._bucket = bucket
+        self._prefix = prefix
+        self._transfer_config = transfer_config
+
+    def _key(self, key: str) -> str:
+        return self._prefix + key
+
+    def put(self, source: Path, key: str) -> str:
+        self._s3.upload_file(str(source), self._bucket, self._key(key), Config=self._transfer_config)
+        return key
+
+    def put_bytes(self, key: str, data: bytes, content_type: str | None = None) -> None:
+        extra = {"ContentType": content_type} if content_type else {}
+        self._s3.put_object(Bucket=self._bucket, Key=self._key(key), Body=data, **extra)
+
+    def get_bytes(self, key: str) -> bytes | None:
+        try:
+            return self._s3.get_object(Bucket=self._bucket, Key=self._key(key))["Body"].read()
+        except ClientError:
+            return None
+
+    def exists(self, key: str) -> bool:
+        return object_exists(self._s3, self._bucket, self._key(key))
+
+    def expire(self, ttl_seconds: int) -> None:
+        # Leftover artifacts (failed or abandoned imports) are removed by a bucket lifecycle
+        # rule scoped to the artifact prefix; S3 expiry works in whole days. PUT replaces the
+        # whole configuration, so our rule is merged by ID into whatever rules already exist.
+        rule = {
+            "ID": ARTIFACT_LIFECYCLE_RULE_ID,
+            "Filter": {"Prefix": self._prefix},
+            "Status": "Enabled",
+            "Expiration": {"Days": max(1, -(-ttl_seconds // 86400))},
+            "AbortIncompleteMultipartUpload": {"DaysAfterInitiation": 1},
+        }
+        try:
+            rules = self._s3.get_bucket_lifecycle_configuration(Bucket=self._bucket)["Rules"]
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") != "NoSuchLifecycleConfiguration":
+                raise
+            rules = []
+        if rule in rules:
+            return
+        merged = [existing for existing in rules if existing.get("ID") != ARTIFACT_LIFECYCLE_RULE_ID] + [rule]
+        self._s3.put_bucket_lifecycle_configuration(Bucket=self._bucket, LifecycleConfiguration={"Rules": merged})
+
+    def source_url(self, key: str, expires_seconds: int = 3600) -> str:
+        # ffmpeg reads the artifact over HTTP (with range requests) instead of a local copy.
+        return self._s3.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self._bucket, "Key": self._key(key)},
+            ExpiresIn=expires_seconds,
+        )
+
+    def open_upload(self, key: str, content_type: str | None = None, on_part=None) -> MultipartUpload:
+        return MultipartUpload(
+            self._s3,
+            self._bucket,
+            self._key(key),
+            part_size=self._transfer_config.multipart_chunksize,
+            max_workers=self._transfer_config.max_concurrency,
+            content_type=content_type,
+            on_part=on_part,
+        )
+
+    def publish(self, key: str, s3, bucket: str, storage_key: str, content_type: str) -> None:
+        # Server-side copy: the finished audio never travels back through the worker.
+        s3.copy_object(
+            Bucket=bucket,
+            Key=storage_key,
+            CopySource={"Bucket": self._bucket, "Key": self._key(key)},
+            ContentType=content_type,
+            MetadataDirective="REPLACE",
+        )
+
+    def delete(self, key: str) -> None:
+        try:
+            self._s3.delete_object(Bucket=self._bucket, Key=self._key(key))
+        except ClientError:
+            pass
+
+
+def make_artifact_store(backend: str, s3, bucket: str, local_dir: str, transfer_config: TransferConfig):
+    if backend == "local":
+        return LocalArtifactStore(local_dir)
+    return S3ArtifactStore(s3, bucket, transfer_config)
@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import redis
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+from redis.exceptions import RedisError
+
+from packages.shared.task_queue import ENQUEUED_AT_HEADER, broker_lists
+
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+
+class QueueBacklogCollector:
+    # Read from the broker at scrape time. Producers LPUSH and workers RPOP, so the
+    # oldest waiting message of each list sits at index -1.
+    def __init__(self, broker_url: str, queues: Callable[[], list[str]], socket_timeout: float = 0.5) -> None:
+        self._client = redis.Redis.from_url(
+            broker_url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+        )
+        self._queues = queues
+
+    def collect(self):
+        depth = GaugeMetricFamily("worker_queue_depth", "Messages waiting in the broker queue", labels=["queue"])
+        age = GaugeMetricFamily(
+            "worker_queue_oldest_message_age_seconds",
+            "Age of the oldest waiting message (0 when the queue is empty)",
+            labels=["queue"],
+        )
+        queues = self._queues()
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for queue in queues:
+                for key in broker_lists(queue):
+                    pipe.llen(key)
+                    pipe.lindex(key, -1)
+            results = iter(pipe.execute())
+        except RedisError:
+            return
+        now = time.time()
+        for queue in queues:
+            waiting, oldest = 0, 0.0
+            for _ in broker_lists(queue):
+                waiting += next(results)
+                enqueued_at = self._enqueued_at(next(results))
+                if enqueued_at is not None:
+                    oldest = max(oldest, now - enqueued_at)
+            depth.add_metric([queue], waiting)
+            age.add_metric([queue], oldest)
+        yield depth
+        yield age
+
+    @staticmethod
+    def _enqueued_at(raw: bytes | None) -> float | None:
+        if raw is None:
+            return None
+        try:
+            return float(json.loads(raw)["headers"][ENQUEUED_AT_HEADER])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+
+class ScratchDiskCollector:
+    def __init__(self, paths: list[str]) -> None:
+        self._paths = paths
+
+    def collect(self):
+        usage = GaugeMetricFamily("worker_scratch_disk_bytes", "Scratch filesystem usage", labels=["path", "state"])
+        for path in self._paths:
+            try:
+                total, used, free = shutil.disk_usage(path)
+            except OSError:
+                continue
+            usage.add_metric([path, "used"], used)
+            usage.add_metric([path, "free"], free)
+            usage.add_metric([path, "total"], total)
+        yield usage
+
+
+def reset_multiprocess_dir() -> None:
+    # Files left by a previous run would be summed into this run's counters.
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return
+    path = Path(PROMETHEUS_MULTIPROC_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    for stale in path.glob("*.db"):
+        stale.unlink(missing_ok=True)
+
+
+def mark_process_dead(pid: int) -> None:
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+def start_exporter(port: int, broker_url: str, queues: Callable[[], list[str]], scratch_paths: list[str]) -> None:
+    # Prefork children write their samples to PROMETHEUS_MULTIPROC_DIR; the parent serves
+    # them merged. Without the directory only the serving process's own samples are visible.
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    registry.register(QueueBacklogCollector(broker_url, queues))
+    registry.register(ScratchDiskCollector(scratch_paths))
+    start_http_server(port, registry=registry)
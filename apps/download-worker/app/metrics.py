@@ -0,0 +1,56 @@
+from prometheus_client import Counter, Histogram
+
+TRANSCODE_SECONDS = Histogram(
+    "worker_transcode_seconds",
+    "Transcode stage time by audio path",
+    ["path"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 40, 80, 160),
+)
+
+UPLOAD_BYTES = Counter("worker_upload_bytes_total", "Bytes uploaded to object storage", ["kind"])
+UPLOAD_SECONDS = Histogram(
+    "worker_upload_seconds",
+    "Upload wall time",
+    ["kind"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 40, 80),
+)
+UPLOAD_THROUGHPUT = Histogram(
+    "worker_upload_throughput_bytes_per_second",
+    "Per-upload throughput",
+    ["kind"],
+    buckets=(256e3, 1e6, 4e6, 16e6, 32e6, 64e6, 128e6, 256e6, 512e6),
+)
+
+STAGE_SECONDS = Histogram(
+    "worker_stage_seconds",
+    "Pipeline stage wall time",
+    ["stage"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 40, 80, 160, 320),
+)
+STAGE_THROUGHPUT = Histogram(
+    "worker_stage_throughput_bytes_per_second",
+    "Bytes handled per second of stage wall time",
+    ["stage"],
+    buckets=(256e3, 1e6, 4e6, 16e6, 32e6, 64e6, 128e6, 256e6, 512e6),
+)
+
+TASK_RUNS = Counter("worker_tasks_total", "Finished task runs by outcome", ["task", "outcome"])
+TASK_SECONDS = Histogram(
+    "worker_task_seconds",
+    "Task run time, retries counted as separate runs",
+    ["task"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 40, 80, 160, 320),
+)
+
+
+def observe_upload(kind: str, nbytes: int, seconds: float) -> None:
+    UPLOAD_BYTES.labels(kind).inc(nbytes)
+    UPLOAD_SECONDS.labels(kind).observe(seconds)
+    if seconds > 0:
+        UPLOAD_THROUGHPUT.labels(kind).observe(nbytes / seconds)
+
+
+def observe_stage(stage: str, seconds: float, nbytes: int | None = None) -> None:
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    if nbytes and seconds > 0:
+        STAGE_THROUGHPUT.labels(stage).observe(nbytes / seconds)
@@ -0,0 +1,106 @@
+import json
+from uuid import uuid4
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from packages.shared.models import DownloadJob, Song, UserSong, utc_now
+
+# A completed job is terminal: redelivered or late tasks must not move it back.
+STARTABLE_STATUSES = ("queued", "processing", "failed")
+FAILABLE_STATUSES = ("queued", "processing")
+
+# Nothing here commits; each task owns one session and commits once per transition.
+
+
+def _insert(db: Session, model):
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def start_job(db: Session, job_id: str) -> bool:
+    result = db.execute(
+        update(DownloadJob)
+        .where(and_(DownloadJob.id == job_id, DownloadJob.status.in_(STARTABLE_STATUSES)))
+        .values(status="processing", failure_reason=None)
+    )
+    return result.rowcount == 1
+
+
+def complete_jobs(db: Session, job_ids: list[str]) -> int:
+    if not job_ids:
+        return 0
+    result = db.execute(
+        update(DownloadJob)
+        .where(and_(DownloadJob.id.in_(job_ids), DownloadJob.status != "completed"))
+        .values(status="completed", failure_reason=None, checkpoint=None)
+    )
+    return result.rowcount
+
+
+def record_stage(db: Session, job_id: str, stage: str, checkpoint: dict) -> bool:
+    result = db.execute(
+        update(DownloadJob)
+        .where(and_(DownloadJob.id == job_id, DownloadJob.status == "processing"))
+        .values(stage=stage, checkpoint=json.dumps(checkpoint))
+    )
+    return result.rowcount == 1
+
+
+def job_checkpoint(db: Session, job_id: str) -> tuple[str | None, dict | None]:
+    row = db.execute(select(DownloadJob.stage, DownloadJob.checkpoint).where(DownloadJob.id == job_id)).one_or_none()
+    if row is None or not row.checkpoint:
+        return None, None
+    return row.stage, json.loads(row.checkpoint)
+
+
+def fail_job(db: Session, job_id: str, reason: str) -> bool:
+    result = db.execute(
+        update(DownloadJob)
+        .where(and_(DownloadJob.id == job_id, DownloadJob.status.in_(FAILABLE_STATUSES)))
+        .values(status="failed", failure_reason=reason[:500])
+    )
+    return result.rowcount == 1
+
+
+def find_song_id(db: Session, source_provider: str, source_id: str) -> str | None:
+    return db.scalar(
+        select(Song.id).where(and_(Song.source_provider == source_provider, Song.source_id == source_id))
+    )
+
+
+def insert_song(db: Session, **values) -> str:
+    # Losing the uq_song_source race returns no row; the winner's id is then read back.
+    song_id = db.scalar(
+        _insert(db, Song)
+        .values(id=str(uuid4()), created_at=utc_now(), **values)
+        .on_conflict_do_nothing(index_elements=["source_provider", "source_id"])
+        .returning(Song.id)
+    )
+    return song_id or find_song_id(db, values["source_provider"], values["source_id"])
+
+
+def grant_ownership(db: Session, user_ids: list[str], song_id: str) -> None:
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return
+    now = utc_now()
+    db.execute(
+        _insert(db, UserSong)
+        .values([{"id": str(uuid4()), "user_id": user_id, "song_id": song_id, "added_at": now} for user_id in user_ids])
+        .on_conflict_do_nothing(index_elements=["user_id", "song_id"])
+    )
+
+
+def job_user_ids(db: Session, job_ids: list[str]) -> list[str]:
+    if not job_ids:
+        return []
+    return list(db.scalars(select(DownloadJob.user_id).where(DownloadJob.id.in_(job_ids))))
+
+
+def jobs_by_id(db: Session, job_ids: list[str]) -> list[DownloadJob]:
+    if not job_ids:
+        return []
+    return list(db.scalars(select(DownloadJob).where(DownloadJob.id.in_(job_ids))))
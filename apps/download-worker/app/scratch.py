@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from prometheus_client import Counter
+
+SCRATCH_CACHE_REQUESTS = Counter("worker_scratch_cache_requests_total", "Scratch cache lookups", ["result"])
+
+META_FILE = "meta.json"
+
+
+class ScratchCache:
+    # Content-keyed local copies of downloaded sources, so a retried or re-run download
+    # stage reuses the file instead of fetching it again. Entries expire after ttl_seconds;
+    # past max_bytes the least recently used go first. Shared by every pool process.
+    def __init__(self, root: str, max_bytes: int, ttl_seconds: int) -> None:
+        self._root = Path(root)
+        self._work = self._root / ".work"
+        self._max_bytes = max_bytes
+        self._ttl_seconds = ttl_seconds
+
+    def _entry(self, key: str) -> Path:
+        return self._root / hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def workdir(self) -> tempfile.TemporaryDirectory:
+        # Same filesystem as the entries, so put() is a rename rather than a copy.
+        self._work.mkdir(parents=True, exist_ok=True)
+        return tempfile.TemporaryDirectory(dir=self._work)
+
+    def get(self, key: str) -> tuple[Path, dict] | None:
+        meta = self._entry(key) / META_FILE
+        try:
+            if time.time() - meta.stat().st_mtime > self._ttl_seconds:
+                shutil.rmtree(meta.parent, ignore_errors=True)
+                SCRATCH_CACHE_REQUESTS.labels("expired").inc()
+                return None
+            data = json.loads(meta.read_text())
+            path = meta.parent / data["file"]
+            if not path.is_file():
+                raise FileNotFoundError(path)
+            os.utime(meta)
+        except (OSError, ValueError, KeyError):
+            SCRATCH_CACHE_REQUESTS.labels("miss").inc()
+            return None
+        SCRATCH_CACHE_REQUESTS.labels("hit").inc()
+        return path, data["info"]
+
+    def put(self, key: str, source: Path, info: dict) -> Path:
+        entry = self._entry(key)
+        self.evict(reserve_bytes=source.stat().st_size)
+        staging = Path(tempfile.mkdtemp(dir=self._work))
+        source.replace(staging / source.name)
+        (staging / META_FILE).write_text(json.dumps({"key": key, "file": source.name, "info": info}))
+        try:
+            staging.rename(entry)
+        except OSError:
+            cached = self.get(key)
+            if cached is not None:
+                # Another process cached the same key first; keep theirs.
+                shutil.rmtree(staging, ignore_errors=True)
+                return cached[0]
+            # An expired or half-written entry is in the way: replace it.
+            shutil.rmtree(entry, ignore_errors=True)
+            try:
+                staging.rename(entry)
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+        return entry / source.name
+
+    def evict(self, reserve_bytes: int = 0) -> None:
+        now = time.time()
+        entries = []
+        for entry in self._root.iterdir() if self._root.is_dir() else ():
+            if entry == self._work or not entry.is_dir():
+                continue
+            try:
+                touched = (entry / META_FILE).stat().st_mtime
+                size = sum(f.stat().st_size for f in entry.iterdir())
+            except OSError:
+                continue
+            if now - touched > self._ttl_seconds:
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            entries.append((touched, size, entry))
+        total = sum(size for _, size, _ in entries) + reserve_bytes
+        for _, size, entry in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
@@ -0,0 +1,39 @@
+import os
+import threading
+
+from boto3.s3.transfer import TransferConfig
+
+from packages.shared.storage import ensure_bucket, make_s3_client
+
+MB = 1024 * 1024
+
+S3_ENDPOINT = os.getenv("S3_ENDPOINT", "http://minio:9000")
+S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY", "minioadmin")
+S3_SECRET_KEY = os.getenv("S3_SECRET_KEY", "minioadmin")
+S3_BUCKET = os.getenv("S3_BUCKET", "songs")
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "16"))
+S3_PART_SIZE_MB = int(os.getenv("S3_PART_SIZE_MB", "8"))
+S3_PART_CONCURRENCY = int(os.getenv("S3_PART_CONCURRENCY", "4"))
+
+s3 = make_s3_client(S3_ENDPOINT, S3_ACCESS_KEY, S3_SECRET_KEY, max_pool_connections=S3_MAX_POOL_CONNECTIONS)
+transfer_config = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD_MB * MB,
+    multipart_chunksize=max(5, S3_PART_SIZE_MB) * MB,
+    max_concurrency=S3_PART_CONCURRENCY,
+    use_threads=True,
+)
+
+_bucket_ready = False
+_bucket_lock = threading.Lock()
+
+
+def ensure_bucket_once() -> None:
+    # One HEAD per worker process instead of a ListBuckets per import.
+    global _bucket_ready
+    if _bucket_ready:
+        return
+    with _bucket_lock:
+        if not _bucket_ready:
+            ensure_bucket(s3, S3_BUCKET)
+            _bucket_ready = True
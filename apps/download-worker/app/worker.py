@@ -1,16 +1,48 @@
+import json
 import os
 import subprocess
 import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
 
-import boto3
-from botocore.client import Config
-from celery import Celery
-from sqlalchemy import and_, select
+from celery import Celery, Task, chain
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
 
 from packages.shared.db import make_engine, make_session_local
-from packages.shared.models import DownloadJob, Song, UserSong
+from packages.shared.import_coalescing import ImportCoalescer
+from packages.shared.job_progress import JobProgress
 from packages.shared.security import validate_security_runtime
+from packages.shared.task_queue import stamp_enqueued_at
+
+from app.artifacts import make_artifact_store
+from app.exporter import mark_process_dead, reset_multiprocess_dir, start_exporter
+from app.metrics import TASK_RUNS, TASK_SECONDS, TRANSCODE_SECONDS, observe_stage, observe_upload
+from app.persistence import (
+    complete_jobs,
+    fail_job,
+    find_song_id,
+    grant_ownership,
+    insert_song,
+    job_checkpoint,
+    job_user_ids,
+    jobs_by_id,
+    record_stage,
+    start_job,
+)
+from app.scratch import ScratchCache
+from app.storage import S3_BUCKET, ensure_bucket_once, s3, transfer_config
+from packages.shared.storage import object_exists
 
 try:
     from yt_dlp import YoutubeDL
@@ -20,56 +52,131 @@ except Exception:
 broker_url = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 result_backend = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
 
-S3_ENDPOINT = os.getenv("S3_ENDPOINT", "http://minio:9000")
-S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY", "minioadmin")
-S3_SECRET_KEY = os.getenv("S3_SECRET_KEY", "minioadmin")
-S3_BUCKET = os.getenv("S3_BUCKET", "songs")
+IMPORT_COALESCING_REDIS_URL = os.getenv("IMPORT_COALESCING_REDIS_URL", broker_url)
+IMPORT_LEASE_SECONDS = int(os.getenv("IMPORT_LEASE_SECONDS", "900"))
+IMPORT_HANDOFF_LEASE_SECONDS = int(os.getenv("IMPORT_HANDOFF_LEASE_SECONDS", "3600"))
+JOB_PROGRESS_REDIS_URL = os.getenv("JOB_PROGRESS_REDIS_URL", broker_url)
+JOB_PROGRESS_INTERVAL_SECONDS = float(os.getenv("JOB_PROGRESS_INTERVAL_SECONDS", "0.5"))
+ARTIFACT_STORE = os.getenv("ARTIFACT_STORE", "s3").lower()
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "/tmp/import-artifacts")
+ARTIFACT_TTL_SECONDS = int(os.getenv("ARTIFACT_TTL_SECONDS", "86400"))
+SCRATCH_DIR = os.getenv("SCRATCH_DIR", os.path.join(tempfile.gettempdir(), "import-scratch"))
+SCRATCH_MAX_MB = int(os.getenv("SCRATCH_MAX_MB", "2048"))
+SCRATCH_TTL_SECONDS = int(os.getenv("SCRATCH_TTL_SECONDS", "21600"))
+TRANSCODE_BITRATE_KBPS = int(os.getenv("TRANSCODE_BITRATE_KBPS", "256"))
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9808"))
+FFMPEG_PROGRESS_KEYS = {
+    "frame",
+    "fps",
+    "bitrate",
+    "total_size",
+    "out_time_us",
+    "out_time_ms",
+    "out_time",
+    "dup_frames",
+    "drop_frames",
+    "speed",
+    "progress",
+}
+
+DOWNLOAD_QUEUE = os.getenv("DOWNLOAD_QUEUE", "download")
+TRANSCODE_QUEUE = os.getenv("TRANSCODE_QUEUE", "transcode")
+STORE_QUEUE = os.getenv("STORE_QUEUE", "store")
+FINALIZE_QUEUE = os.getenv("FINALIZE_QUEUE", "finalize")
 
 celery_app = Celery("download-worker", broker=broker_url, backend=result_backend)
 celery_app.conf.broker_connection_retry_on_startup = True
+# process_import_job stays on the default queue producers already send to; each stage gets
+# its own queue so download (network-bound) and transcode (CPU-bound) workers scale apart.
+celery_app.conf.task_routes = {
+    "app.worker.download_audio": {"queue": DOWNLOAD_QUEUE},
+    "app.worker.transcode_audio": {"queue": TRANSCODE_QUEUE},
+    "app.worker.store_audio": {"queue": STORE_QUEUE},
+    "app.worker.finalize_catalog_and_ownership": {"queue": FINALIZE_QUEUE},
+}
+celery_app.conf.worker_prefetch_multiplier = int(os.getenv("CELERY_PREFETCH_MULTIPLIER", "1"))
+celery_app.conf.task_acks_late = True
 validate_security_runtime()
 engine = make_engine()
 SessionLocal = make_session_local()
+coalescer = ImportCoalescer(IMPORT_COALESCING_REDIS_URL, lease_seconds=IMPORT_LEASE_SECONDS)
+progress = JobProgress(JOB_PROGRESS_REDIS_URL, min_interval_seconds=JOB_PROGRESS_INTERVAL_SECONDS)
 
-s3 = boto3.client(
-    "s3",
-    endpoint_url=S3_ENDPOINT,
-    aws_access_key_id=S3_ACCESS_KEY,
-    aws_secret_access_key=S3_SECRET_KEY,
-    config=Config(signature_version="s3v4"),
-    region_name="us-east-1",
-)
+artifacts = make_artifact_store(ARTIFACT_STORE, s3, S3_BUCKET, ARTIFACT_DIR, transfer_config)
+scratch = ScratchCache(SCRATCH_DIR, SCRATCH_MAX_MB * 1024 * 1024, SCRATCH_TTL_SECONDS)
 
+# Stage order; a job's recorded stage is the last one that finished.
+PIPELINE_STAGES = ("download", "transcode", "store", "finalize")
+INFO_KEYS = ("title", "uploader", "channel", "duration", "acodec", "abr", "ext")
 
-def ensure_bucket() -> None:
-    buckets = [b["Name"] for b in s3.list_buckets().get("Buckets", [])]
-    if S3_BUCKET not in buckets:
-        s3.create_bucket(Bucket=S3_BUCKET)
 
-
-def set_job_status(job_id: str, status: str, failure_reason: str | None = None) -> None:
-    with SessionLocal() as db:
-        job = db.scalar(select(DownloadJob).where(DownloadJob.id == job_id))
-        if job is None:
-            return
-        job.status = status
-        job.failure_reason = failure_reason
-        db.commit()
+before_task_publish.connect(stamp_enqueued_at)
+task_started_at: dict[str, float] = {}
 
 
-def add_user_song_if_missing(db, user_id: str, song_id: str) -> None:
-    existing = db.scalar(
-        select(UserSong).where(and_(UserSong.user_id == user_id, UserSong.song_id == song_id))
+@worker_init.connect
+def init_worker(sender=None, **_) -> None:
+    # Runs once in the parent, after -Q is applied and before the pool forks.
+    reset_multiprocess_dir()
+    scratch.evict()
+    try:
+        ensure_bucket_once()
+        artifacts.expire(ARTIFACT_TTL_SECONDS)
+    except Exception:
+        pass
+    if WORKER_METRICS_PORT <= 0:
+        return
+    consumed = sender.app.amqp.queues.consume_from if sender is not None else None
+    scratch_paths = [tempfile.gettempdir(), SCRATCH_DIR] + ([ARTIFACT_DIR] if ARTIFACT_STORE == "local" else [])
+    start_exporter(
+        WORKER_METRICS_PORT,
+        broker_url,
+        lambda: sorted(consumed or celery_app.amqp.queues),
+        scratch_paths,
     )
-    if existing is None:
-        db.add(UserSong(user_id=user_id, song_id=song_id))
-        db.commit()
 
 
-def download_from_youtube(source_video_id: str, output_dir: Path) -> tuple[Path, dict]:
+@worker_process_shutdown.connect
+def shutdown_worker_process(pid=None, **_) -> None:
+    mark_process_dead(pid or os.getpid())
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, **_) -> None:
+    task_started_at[task_id] = time.monotonic()
+
+
+@task_postrun.connect
+def record_task_outcome(task_id=None, task=None, state=None, **_) -> None:
+    started = task_started_at.pop(task_id, None)
+    name = getattr(task, "name", "unknown")
+    TASK_RUNS.labels(name, (state or "unknown").lower()).inc()
+    if started is not None:
+        TASK_SECONDS.labels(name).observe(time.monotonic() - started)
+
+
+@worker_process_init.connect
+def init_worker_process(**_) -> None:
+    # Fail soft: a stage calls ensure_bucket_once() again before it first touches storage.
+    try:
+        ensure_bucket_once()
+    except Exception:
+        pass
+
+
+def download_from_youtube(source_video_id: str, output_dir: Path, on_progress=None) -> tuple[Path, dict]:
     if YoutubeDL is None:
         raise RuntimeError("yt-dlp is not available")
 
+    def hook(d: dict) -> None:
+        if d.get("status") == "downloading":
+            on_progress(
+                downloaded_bytes=d.get("downloaded_bytes"),
+                total_bytes=d.get("total_bytes") or d.get("total_bytes_estimate"),
+                speed_bps=d.get("speed"),
+                eta_seconds=d.get("eta"),
+            )
+
     output_tpl = str(output_dir / f"{source_video_id}.%(ext)s")
     opts = {
         "quiet": True,
@@ -77,122 +184,422 @@ def download_from_youtube(source_video_id: str, output_dir: Path) -> tuple[Path,
         "format": "bestaudio/best",
         "outtmpl": output_tpl,
     }
+    if on_progress is not None:
+        opts["progress_hooks"] = [hook]
     with YoutubeDL(opts) as ydl:
         info = ydl.extract_info(f"https://www.youtube.com/watch?v={source_video_id}", download=True)
         downloaded = Path(ydl.prepare_filename(info))
     return downloaded, info
 
 
-def transcode_to_aac(source_file: Path, output_dir: Path, source_video_id: str) -> Path:
-    output = output_dir / f"{source_video_id}.m4a"
+def plan_audio(info: dict) -> tuple[str, str, int | None]:
+    # AAC from YouTube (itag 140) needs no re-encode: an m4a download is published as is,
+    # AAC in any other container is remuxed. Everything else (Opus/WebM) is transcoded.
+    # Every path stores AAC, so Song.codec is always "aac" whatever the source profile.
+    acodec = info.get("acodec") or ""
+    if not acodec.startswith("mp4a"):
+        return "transcode", "aac", TRANSCODE_BITRATE_KBPS
+    bitrate = round(info["abr"]) if info.get("abr") else None
+    if info.get("ext") == "m4a":
+        return "passthrough", "aac", bitrate
+    return "remux", "aac", bitrate
+
+
+def drain_ffmpeg_stderr(stream, errors: deque, on_progress=None) -> None:
+    # With -progress pipe:2 the key=value progress blocks share stderr with error lines.
+    for raw in stream:
+        line = raw.decode(errors="replace").strip()
+        key, sep, value = line.partition("=")
+        if sep and key in FFMPEG_PROGRESS_KEYS:
+            if key == "out_time_us" and on_progress is not None and value.isdigit():
+                on_progress(int(value) / 1_000_000)
+            continue
+        if line:
+            errors.append(line)
+
+
+def transcode_to_aac(source: str, upload, path: str = "transcode", on_progress=None) -> int:
+    # Fragmented MP4 needs no seek-back to write the moov atom, so ffmpeg can write to a
+    # pipe that feeds the upload directly; nothing touches the scratch disk.
+    codec_args = ["-c:a", "copy"] if path == "remux" else ["-c:a", "aac", "-b:a", f"{TRANSCODE_BITRATE_KBPS}k"]
     cmd = [
         "ffmpeg",
-        "-y",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-nostats",
+        "-progress",
+        "pipe:2",
         "-i",
-        str(source_file),
+        source,
         "-vn",
-        "-c:a",
-        "aac",
-        "-b:a",
-        "256k",
-        str(output),
+        *codec_args,
+        "-f",
+        "mp4",
+        "-movflags",
+        "empty_moov+default_base_moof",
+        "-frag_duration",
+        "1000000",
+        "pipe:1",
     ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(f"ffmpeg failed: {result.stderr[-500:]}")
-    return output
-
-
-@celery_app.task(
-    name="app.worker.process_import_job",
-    autoretry_for=(Exception,),
-    retry_backoff=True,
-    retry_jitter=True,
-    max_retries=4,
-)
-def process_import_job(
-    job_id: str,
-    user_id: str,
-    source_provider: str,
-    source_video_id: str,
-    title: str | None = None,
-    artist: str | None = None,
-    candidate_meta: dict | None = None,
-):
-    del candidate_meta
-    set_job_status(job_id, "processing")
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stderr: deque[str] = deque(maxlen=20)
+    drain = threading.Thread(target=drain_ffmpeg_stderr, args=(proc.stderr, stderr, on_progress), daemon=True)
+    drain.start()
     try:
-        with SessionLocal() as db:
-            existing_song = db.scalar(
-                select(Song).where(and_(Song.source_provider == source_provider, Song.source_id == source_video_id))
-            )
-            if existing_song:
-                add_user_song_if_missing(db, user_id, existing_song.id)
-                set_job_status(job_id, "completed")
-                return {"job_id": job_id, "song_id": existing_song.id, "status": "completed"}
-
-        with tempfile.TemporaryDirectory() as tmp:
-            tmp_path = Path(tmp)
-            downloaded_file, info = download_from_youtube(source_video_id, tmp_path)
-            transcoded_file = transcode_to_aac(downloaded_file, tmp_path, source_video_id)
+        written = upload.write_from(proc.stdout)
+    except BaseException:
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        proc.wait()
+        drain.join()
+        # An ffmpeg failure (positive exit code) explains an empty or short upload better than the upload error.
+        if proc.returncode > 0:
+            raise RuntimeError(f"ffmpeg failed: {' '.join(stderr)[-500:]}")
+    return written
+
+
+def requeue_followers(db, follower_job_ids: list[str]) -> None:
+    # The leader failed: hand the work back so one follower can take over the lease.
+    for job in jobs_by_id(db, follower_job_ids):
+        meta = json.loads(job.candidate_meta or "{}")
+        process_import_job.apply_async(
+            kwargs={
+                "job_id": job.id,
+                "user_id": job.user_id,
+                "source_provider": job.source_provider,
+                "source_video_id": job.source_id,
+                "title": meta.get("title"),
+                "artist": meta.get("artist"),
+            }
+        )
+
+
+@contextmanager
+def stage_progress(job_id: str, stage: str, **fields):
+    # Yields a throttled publisher for the stage; the stage change itself is always written.
+    progress.publish(job_id, stage, force=True, **fields)
+    try:
+        yield partial(progress.publish, job_id, stage)
+    finally:
+        progress.forget(job_id)
 
-            ensure_bucket()
-            storage_key = f"songs/{source_provider}/{source_video_id}.m4a"
-            s3.upload_file(str(transcoded_file), S3_BUCKET, storage_key, ExtraArgs={"ContentType": "audio/aac"})
 
-            with SessionLocal() as db:
-                song = db.scalar(
-                    select(Song).where(and_(Song.source_provider == source_provider, Song.source_id == source_video_id))
-                )
-                if song is None:
-                    song = Song(
-                        source_provider=source_provider,
-                        source_id=source_video_id,
-                        title=title or info.get("title") or source_video_id,
-                        artist=artist or info.get("uploader") or "Unknown Artist",
-                        duration_sec=info.get("duration"),
-                        source_channel=info.get("channel") or info.get("uploader"),
-                        quality_score=0.9,
-                        storage_key=storage_key,
-                        codec="aac",
-                        bitrate_kbps=256,
-                    )
-                    db.add(song)
-                    db.commit()
-                    db.refresh(song)
+def settle_progress(job_ids: list[str], stage: str, **fields) -> None:
+    for job_id in job_ids:
+        progress.publish(job_id, stage, force=True, **fields)
+        progress.forget(job_id)
 
-                add_user_song_if_missing(db, user_id, song.id)
 
-        set_job_status(job_id, "completed")
-        return {"job_id": job_id, "status": "completed"}
-    except Exception as exc:
-        set_job_status(job_id, "failed", str(exc)[:500])
+def finish_import(db, ctx: dict, song_id: str) -> dict:
+    # Leader and followers are settled in one transaction: one ownership INSERT, one status UPDATE.
+    # The lease is released only after that commit, so a failed commit leaves the followers
+    # attached for the task's retry (or its final on_failure) and no new leader can start.
+    followers = coalescer.followers(ctx["source_provider"], ctx["source_video_id"])
+    try:
+        grant_ownership(db, [ctx["user_id"], *job_user_ids(db, followers)], song_id)
+        complete_jobs(db, [ctx["job_id"], *followers])
+        db.commit()
+    except Exception:
+        db.rollback()
         raise
+    released = coalescer.release(ctx["source_provider"], ctx["source_video_id"], ctx["job_id"])
+    # Jobs that joined between the read and the release; the song is catalogued by now.
+    late = [job_id for job_id in released if job_id not in followers]
+    if late:
+        try:
+            grant_ownership(db, job_user_ids(db, late), song_id)
+            complete_jobs(db, late)
+            db.commit()
+        except Exception:
+            db.rollback()
+            requeue_followers(db, late)
+            late = []
+    settle_progress([ctx["job_id"], *followers, *late], "completed")
+    return {"job_id": ctx["job_id"], "song_id": song_id, "status": "completed"}
+
+
+def mark_failed(job_id: str, reason: str) -> None:
+    with SessionLocal() as db:
+        fail_job(db, job_id, reason)
+        db.commit()
+    settle_progress([job_id], "failed")
+
 
+def source_prefix(ctx: dict) -> str:
+    # Artifacts are keyed by source, not job: a re-run or a follower taking over after a
+    # failed leader picks up whatever the previous attempt already produced.
+    return f"sources/{ctx['source_provider']}/{ctx['source_video_id']}"
 
-@celery_app.task(name="app.worker.download_audio")
-def download_audio(source_video_id: str, job_id: str):
-    return {"source_video_id": source_video_id, "job_id": job_id, "detail": "deprecated task"}
 
+@contextmanager
+def lease_heartbeat(ctx: dict):
+    # A long download or transcode can outlast IMPORT_LEASE_SECONDS; without renewal the next
+    # job for the source would become a second leader and download it again.
+    stop = threading.Event()
 
-@celery_app.task(name="app.worker.transcode_audio")
-def transcode_audio(temp_key: str, target_codec: str = "aac", bitrate: str = "256k"):
-    return {"temp_key": temp_key, "target_codec": target_codec, "bitrate": bitrate}
+    def beat() -> None:
+        while not stop.wait(IMPORT_LEASE_SECONDS / 3):
+            coalescer.renew(ctx["source_provider"], ctx["source_video_id"], ctx["job_id"])
 
+    coalescer.renew(ctx["source_provider"], ctx["source_video_id"], ctx["job_id"])
+    thread = threading.Thread(target=beat, name="import-lease", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def hand_off_lease(ctx: dict) -> None:
+    # The next stage may sit behind a backlog on its queue, which no heartbeat covers.
+    coalescer.renew(ctx["source_provider"], ctx["source_video_id"], ctx["job_id"], IMPORT_HANDOFF_LEASE_SECONDS)
 
-@celery_app.task(name="app.worker.store_audio")
-def store_audio(file_key: str, metadata: dict):
-    return {"file_key": file_key, "metadata": metadata}
+
+def save_checkpoint(ctx: dict, stage: str) -> dict:
+    with SessionLocal() as db:
+        record_stage(db, ctx["job_id"], stage, ctx)
+        db.commit()
+    return ctx
+
+
+def resume_point(stage: str | None, checkpoint: dict | None) -> int:
+    # Index of the first stage to run; a checkpoint whose artifact has expired starts over.
+    if stage not in PIPELINE_STAGES[:-1] or not checkpoint:
+        return 0
+    needed = {"download": checkpoint.get("source_key"), "transcode": checkpoint.get("audio_key")}.get(stage)
+    if stage != "store" and not (needed and artifacts.exists(needed)):
+        return 0
+    return PIPELINE_STAGES.index(stage) + 1
+
+
+class ImportStageTask(Task):
+    # Stages retry on their own; only once a stage has exhausted its retries does the
+    # whole import fail and release its followers.
+    autoretry_for = (Exception,)
+    retry_backoff = True
+    retry_jitter = True
+    max_retries = 4
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        # Artifacts are kept for the next attempt to resume from; ARTIFACT_TTL_SECONDS
+        # clears the ones nobody comes back for.
+        ctx = args[0] if args else kwargs.get("ctx")
+        if not ctx:
+            return
+        with SessionLocal() as db:
+            requeue_followers(db, coalescer.release(ctx["source_provider"], ctx["source_video_id"], ctx["job_id"]))
+            fail_job(db, ctx["job_id"], str(exc))
+            db.commit()
+        settle_progress([ctx["job_id"]], "failed")
+
+
+class ImportJobTask(Task):
+    autoretry_for = (Exception,)
+    retry_backoff = True
+    retry_jitter = True
+    max_retries = 4
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        # Retries are exhausted. The job is failed (and `failed` published) only now: clients
+        # waiting on the job treat it as terminal. If the job still leads, its followers are
+        # handed back so one of them can take over; earlier attempts re-claim the lease.
+        params = {**dict(zip(("job_id", "user_id", "source_provider", "source_video_id"), args)), **kwargs}
+        source = (params["source_provider"], params["source_video_id"])
+        if coalescer.leader(*source) == params["job_id"]:
+            with SessionLocal() as db:
+                requeue_followers(db, coalescer.release(*source, params["job_id"]))
+        mark_failed(params["job_id"], str(exc))
 
 
-@celery_app.task(name="app.worker.finalize_catalog_and_ownership")
-def finalize_catalog_and_ownership(job_id: str, user_id: str, source_video_id: str, storage_key: str, metadata: dict):
-    return {
+@celery_app.task(name="app.worker.process_import_job", base=ImportJobTask)
+def process_import_job(
+    job_id: str,
+    user_id: str,
+    source_provider: str,
+    source_video_id: str,
+    title: str | None = None,
+    artist: str | None = None,
+    candidate_meta: dict | None = None,
+):
+    del candidate_meta
+    ctx = {
         "job_id": job_id,
         "user_id": user_id,
+        "source_provider": source_provider,
         "source_video_id": source_video_id,
-        "storage_key": storage_key,
-        "metadata": metadata,
+        "title": title,
+        "artist": artist,
     }
+    with SessionLocal() as db:
+        if not start_job(db, job_id):
+            # Already completed (e.g. by a leader, or a redelivered message).
+            return {"job_id": job_id, "status": "skipped"}
+        db.commit()
 
-
+        song_id = find_song_id(db, source_provider, source_video_id)
+        if song_id is not None:
+            grant_ownership(db, [user_id], song_id)
+            complete_jobs(db, [job_id])
+            db.commit()
+            settle_progress([job_id], "completed")
+            return {"job_id": job_id, "song_id": song_id, "status": "completed"}
+
+        leader_job_id = coalescer.claim(source_provider, source_video_id, job_id)
+        if leader_job_id is not None:
+            # The leader completes this job (and grants ownership) when it finishes.
+            settle_progress([job_id], "coalesced", leader_job_id=leader_job_id)
+            return {"job_id": job_id, "leader_job_id": leader_job_id, "status": "coalesced"}
+
+        # A previous leader may have finished between the first check and the claim.
+        song_id = find_song_id(db, source_provider, source_video_id)
+        if song_id is not None:
+            return finish_import(db, ctx, song_id)
+        stage, checkpoint = job_checkpoint(db, job_id)
+        start = resume_point(stage, checkpoint)
+        stages = [download_audio, transcode_audio, store_audio, finalize_catalog_and_ownership][start:]
+        # Written before dispatch so it cannot overwrite the first stage's first update.
+        settle_progress([job_id], "queued", resumed_after=stage if start else None)
+        hand_off_lease(ctx)
+        chain(stages[0].s(checkpoint if start else ctx), *(task.s() for task in stages[1:])).apply_async()
+    return {"job_id": job_id, "status": "processing"}
+
+
+def reuse_source_artifact(prefix: str) -> tuple[str, int, dict] | None:
+    raw = artifacts.get_bytes(f"{prefix}/info.json")
+    if raw is None:
+        return None
+    meta = json.loads(raw)
+    if not artifacts.exists(meta["source_key"]):
+        return None
+    return meta["source_key"], meta["source_bytes"], meta["info"]
+
+
+def fetch_source(ctx: dict, prefix: str, report) -> tuple[str, int, dict]:
+    cache_key = f"{ctx['source_provider']}:{ctx['source_video_id']}"
+    cached = scratch.get(cache_key)
+    if cached is not None:
+        source_file, info = cached
+    else:
+        with scratch.workdir() as tmp:
+            downloaded_file, full_info = download_from_youtube(ctx["source_video_id"], Path(tmp), on_progress=report)
+            info = {k: full_info.get(k) for k in INFO_KEYS}
+            source_file = scratch.put(cache_key, downloaded_file, info)
+    source_bytes = source_file.stat().st_size
+    source_key = f"{prefix}/source{source_file.suffix}"
+    ensure_bucket_once()
+    upload_started = time.monotonic()
+    artifacts.put(source_file, source_key)
+    observe_upload("source", source_bytes, time.monotonic() - upload_started)
+    # Written last: its presence means the source artifact is complete.
+    meta = {"source_key": source_key, "source_bytes": source_bytes, "info": info}
+    artifacts.put_bytes(f"{prefix}/info.json", json.dumps(meta).encode("utf-8"), "application/json")
+    return source_key, source_bytes, info
+
+
+def drop_source(ctx: dict) -> None:
+    artifacts.delete(ctx["source_key"])
+    artifacts.delete(f"{source_prefix(ctx)}/info.json")
+
+
+@celery_app.task(name="app.worker.download_audio", base=ImportStageTask)
+def download_audio(ctx: dict):
+    started = time.monotonic()
+    prefix = source_prefix(ctx)
+    with lease_heartbeat(ctx), stage_progress(ctx["job_id"], "download") as report:
+        reused = reuse_source_artifact(prefix)
+        source_key, source_bytes, info = reused if reused is not None else fetch_source(ctx, prefix, report)
+    hand_off_lease(ctx)
+    observe_stage("download", time.monotonic() - started, None if reused else source_bytes)
+    return save_checkpoint({**ctx, "source_key": source_key, "source_bytes": source_bytes, "info": info}, "download")
+
+
+@celery_app.task(name="app.worker.transcode_audio", base=ImportStageTask)
+def transcode_audio(ctx: dict):
+    path, codec, bitrate_kbps = plan_audio(ctx["info"])
+    started = time.monotonic()
+    duration = ctx["info"].get("duration")
+    with lease_heartbeat(ctx), stage_progress(ctx["job_id"], "transcode", duration_seconds=duration) as report:
+        if path == "passthrough":
+            audio_key = ctx["source_key"]
+            audio_bytes = ctx.get("source_bytes")
+        else:
+            audio_key = f"audio/{ctx['source_provider']}/{ctx['source_video_id']}.m4a"
+            audio_bytes = None
+            # A retry after the upload completed finds the finished artifact and skips ffmpeg.
+            if not artifacts.exists(audio_key):
+                upload = artifacts.open_upload(
+                    audio_key,
+                    "audio/aac",
+                    on_part=lambda parts_done, uploaded_bytes: report(parts_done=parts_done, uploaded_bytes=uploaded_bytes),
+                )
+                try:
+                    audio_bytes = transcode_to_aac(
+                        artifacts.source_url(ctx["source_key"]),
+                        upload,
+                        path,
+                        on_progress=lambda position: report(position_seconds=position),
+                    )
+                except BaseException:
+                    upload.abort()
+                    raise
+                upload.complete()
+                observe_upload("audio", audio_bytes, time.monotonic() - started)
+            drop_source(ctx)
+    TRANSCODE_SECONDS.labels(path).observe(time.monotonic() - started)
+    observe_stage("transcode", time.monotonic() - started, audio_bytes)
+    hand_off_lease(ctx)
+    out = {
+        **ctx,
+        "source_key": None if path != "passthrough" else ctx["source_key"],
+        "audio_key": audio_key,
+        "audio_bytes": audio_bytes,
+        "transcode_path": path,
+        "codec": codec,
+        "bitrate_kbps": bitrate_kbps,
+    }
+    return save_checkpoint(out, "transcode")
+
+
+@celery_app.task(name="app.worker.store_audio", base=ImportStageTask)
+def store_audio(ctx: dict):
+    storage_key = f"songs/{ctx['source_provider']}/{ctx['source_video_id']}.m4a"
+    started = time.monotonic()
+    with lease_heartbeat(ctx), stage_progress(ctx["job_id"], "store"):
+        ensure_bucket_once()
+        # A retry after the copy (and the artifact delete) has nothing left to copy.
+        if not object_exists(s3, S3_BUCKET, storage_key):
+            artifacts.publish(ctx["audio_key"], s3, S3_BUCKET, storage_key, "audio/aac")
+        artifacts.delete(ctx["audio_key"])
+        if ctx.get("source_key"):
+            drop_source(ctx)
+    observe_stage("store", time.monotonic() - started, ctx.get("audio_bytes"))
+    hand_off_lease(ctx)
+    return save_checkpoint({**ctx, "source_key": None, "audio_key": None, "storage_key": storage_key}, "store")
+
+
+@celery_app.task(name="app.worker.finalize_catalog_and_ownership", base=ImportStageTask)
+def finalize_catalog_and_ownership(ctx: dict):
+    info = ctx["info"]
+    started = time.monotonic()
+    progress.publish(ctx["job_id"], "finalize", force=True)
+    with SessionLocal() as db:
+        song_id = insert_song(
+            db,
+            source_provider=ctx["source_provider"],
+            source_id=ctx["source_video_id"],
+            title=ctx["title"] or info.get("title") or ctx["source_video_id"],
+            artist=ctx["artist"] or info.get("uploader") or "Unknown Artist",
+            duration_sec=info.get("duration"),
+            source_channel=info.get("channel") or info.get("uploader"),
+            quality_score=0.9,
+            storage_key=ctx["storage_key"],
+            codec=ctx["codec"],
+            bitrate_kbps=ctx["bitrate_kbps"],
+        )
+        result = finish_import(db, ctx, song_id)
+    observe_stage("finalize", time.monotonic() - started)
+    return result
@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+import redis.asyncio as redis_asyncio
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+
+from packages.shared.cache import TTLCache
+
+SEARCH_CACHE_REQUESTS = Counter(
+    "search_cache_requests_total",
+    "Search requests by cache outcome",
+    ["result"],
+)
+
+
+class SingleFlight:
+    # Concurrent callers with the same key share one task. The task is not tied to
+    # the first caller, so a disconnecting client does not cancel the work for the rest.
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def running(self, key: str) -> asyncio.Task | None:
+        return self._inflight.get(key)
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> tuple[asyncio.Task, bool]:
+        task = self._inflight.get(key)
+        if task is not None:
+            return task, True
+        task = asyncio.create_task(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return task, False
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        task, shared = self.start(key, fn)
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+
+class EntryFeed:
+    # Entries of one streaming extraction. Every request that joins the flight replays them
+    # from the start, then follows new ones until the extraction closes the feed.
+    def __init__(self) -> None:
+        self.entries: list[dict] = []
+        self.closed = False
+        self._changed = asyncio.Event()
+
+    def push(self, entry: dict) -> None:
+        self.entries.append(entry)
+        self._notify()
+
+    def close(self) -> None:
+        self.closed = True
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[dict]:
+        index = 0
+        while True:
+            while index < len(self.entries):
+                yield self.entries[index]
+                index += 1
+            if self.closed:
+                return
+            await self._changed.wait()
+
+
+class SearchCache:
+    def __init__(
+        self,
+        redis_url: str | None,
+        ttl_seconds: int,
+        stale_seconds: int,
+        local_size: int,
+        negative_ttl_seconds: int = 60,
+        redis_timeout_seconds: float = 0.25,
+        redis_retry_after_seconds: float = 5.0,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._stale_seconds = stale_seconds
+        self._local = TTLCache(local_size)
+        self._negative_ttl_seconds = negative_ttl_seconds
+        self._negative = TTLCache(local_size)
+        self._redis = (
+            redis_asyncio.Redis.from_url(
+                redis_url,
+                socket_timeout=redis_timeout_seconds,
+                socket_connect_timeout=redis_timeout_seconds,
+            )
+            if redis_url
+            else None
+        )
+        self._redis_retry_after_seconds = redis_retry_after_seconds
+        self._redis_unavailable_until = 0.0
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return "search:v1:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _negative_redis_key(key: str) -> str:
+        return "search:neg:v1:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _redis_usable(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_unavailable_until
+
+    def _mark_redis_unavailable(self) -> None:
+        self._redis_unavailable_until = time.monotonic() + self._redis_retry_after_seconds
+
+    async def get(self, key: str) -> tuple[dict | None, bool]:
+        entry = self._local.get(key)
+        if entry is None and self._redis_usable():
+            try:
+                raw = await self._redis.get(self._redis_key(key))
+            except RedisError:
+                self._mark_redis_unavailable()
+                raw = None
+            if raw:
+                entry = json.loads(raw)
+                self._local.set(key, entry, entry["stored_at"] + self._ttl_seconds + self._stale_seconds)
+        if entry is None:
+            return None, False
+        fresh = entry["stored_at"] + self._ttl_seconds > time.time()
+        return entry["value"], fresh
+
+    async def set(self, key: str, value: dict) -> None:
+        now = time.time()
+        entry = {"stored_at": now, "value": value}
+        lifetime = self._ttl_seconds + self._stale_seconds
+        self._local.set(key, entry, now + lifetime)
+        if not self._redis_usable():
+            return
+        try:
+            await self._redis.set(self._redis_key(key), json.dumps(entry), ex=lifetime)
+        except RedisError:
+            self._mark_redis_unavailable()
+
+    async def is_negative(self, key: str) -> bool:
+        if self._negative_ttl_seconds <= 0:
+            return False
+        if self._negative.get(key):
+            return True
+        if not self._redis_usable():
+            return False
+        try:
+            ttl = await self._redis.pttl(self._negative_redis_key(key))
+        except RedisError:
+            self._mark_redis_unavailable()
+            return False
+        if ttl <= 0:
+            return False
+        self._negative.set(key, True, time.time() + ttl / 1000.0)
+        return True
+
+    async def set_negative(self, key: str) -> None:
+        if self._negative_ttl_seconds <= 0:
+            return
+        self._negative.set(key, True, time.time() + self._negative_ttl_seconds)
+        if not self._redis_usable():
+            return
+        try:
+            await self._redis.set(self._negative_redis_key(key), "1", ex=self._negative_ttl_seconds)
+        except RedisError:
+            self._mark_redis_unavailable()
+
+    async def aclose(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
@@ -0,0 +1,311 @@
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from prometheus_client import Counter, Gauge, Histogram
+
+try:
+    from yt_dlp import YoutubeDL
+except Exception:
+    YoutubeDL = None
+
+EXTRACTION_PENDING = Gauge("search_extraction_pending", "Extractions queued or running")
+EXTRACTION_RUNNING = Gauge("search_extraction_running", "Extractions currently running")
+EXTRACTION_REJECTED = Counter("search_extraction_rejected_total", "Extractions rejected because the pool was full")
+EXTRACTION_CIRCUIT_STATE = Gauge(
+    "search_extraction_circuit_state",
+    "yt-dlp circuit state (0 closed, 1 open, 2 half-open)",
+)
+EXTRACTION_CIRCUIT_REJECTED = Counter(
+    "search_extraction_circuit_rejected_total",
+    "Extractions skipped because the circuit was open",
+)
+EXTRACTION_SECONDS = Histogram(
+    "search_extraction_seconds",
+    "yt-dlp search extraction time",
+    ["outcome"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 12, 20, 30),
+)
+
+YDL_OPTS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "extract_flat": True,
+    "default_search": "ytsearch",
+    "noplaylist": True,
+    "ignoreerrors": True,
+}
+
+
+_STREAM_END = object()
+FAILED_OUTCOMES = {"error", "timeout", "incomplete"}
+
+# CircuitBreaker.allow() admissions; the caller holding PROBE must settle it.
+ADMIT_CLOSED = "closed"
+ADMIT_PROBE = "probe"
+
+
+class ExtractionSaturated(Exception):
+    pass
+
+
+class ExtractionUnavailable(Exception):
+    pass
+
+
+class ExtractionIncomplete(Exception):
+    pass
+
+
+class CircuitBreaker:
+    # Opens after `failure_threshold` consecutive failed extractions. Once the cooldown
+    # passes, a single probe is let through: success closes the circuit, failure re-opens
+    # it with the cooldown doubled (capped at max_cooldown_seconds). The probe's holder must
+    # either record() its outcome or release_probe() if it never reached YouTube.
+    def __init__(self, failure_threshold: int, cooldown_seconds: float, max_cooldown_seconds: float) -> None:
+        self._failure_threshold = max(1, failure_threshold)
+        self._base_cooldown = cooldown_seconds
+        self._max_cooldown = max(cooldown_seconds, max_cooldown_seconds)
+        self._cooldown = cooldown_seconds
+        self._failures = 0
+        self._open_until: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+        EXTRACTION_CIRCUIT_STATE.set(0)
+
+    def allow(self) -> str | None:
+        with self._lock:
+            if self._open_until is None:
+                return ADMIT_CLOSED
+            if self._probing or time.monotonic() < self._open_until:
+                return None
+            self._probing = True
+            EXTRACTION_CIRCUIT_STATE.set(2)
+            return ADMIT_PROBE
+
+    def release_probe(self) -> None:
+        with self._lock:
+            self._probing = False
+            if self._open_until is not None:
+                EXTRACTION_CIRCUIT_STATE.set(1)
+
+    def record(self, success: bool, probe: bool = False) -> None:
+        with self._lock:
+            if probe:
+                self._probing = False
+            if success:
+                self._failures = 0
+                self._open_until = None
+                self._probing = False
+                self._cooldown = self._base_cooldown
+                EXTRACTION_CIRCUIT_STATE.set(0)
+                return
+            self._failures += 1
+            if probe:
+                self._cooldown = min(self._max_cooldown, self._cooldown * 2)
+            elif self._open_until is not None or self._failures < self._failure_threshold:
+                return
+            self._open_until = time.monotonic() + self._cooldown
+            EXTRACTION_CIRCUIT_STATE.set(1)
+
+
+class ExtractionPool:
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        deadline_seconds: float,
+        socket_timeout_seconds: float = 8.0,
+        min_attempt_seconds: float = 1.0,
+        max_attempts: int = 3,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 30.0,
+        max_cooldown_seconds: float = 300.0,
+    ) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="yt-extract")
+        self._capacity = max(1, max_workers) + max(0, max_queue)
+        self._deadline_seconds = deadline_seconds
+        self._socket_timeout_seconds = socket_timeout_seconds
+        self._min_attempt_seconds = min_attempt_seconds
+        self._max_attempts = max(1, max_attempts)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._local = threading.local()
+        self._breaker = CircuitBreaker(failure_threshold, cooldown_seconds, max_cooldown_seconds)
+
+    async def extract(self, query: str, limit: int = 20) -> tuple[list[dict], bool]:
+        # Returns the entries and whether yt-dlp ran the search to its end; a list cut short
+        # by the deadline or an error is still returned, but must not be cached as the answer.
+        probe = self._acquire()
+        finished = threading.Event()
+        deadline = time.monotonic() + self._deadline_seconds
+        future = self._submit(query, limit, deadline, probe, None, None, finished)
+        try:
+            entries = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self._deadline_seconds + 1)
+        except asyncio.TimeoutError:
+            return [], False
+        return entries, finished.is_set()
+
+    def stream(self, query: str, limit: int = 20) -> AsyncIterator[dict]:
+        # Takes a pool slot immediately so saturation surfaces before a response is started.
+        probe = self._acquire()
+        loop = asyncio.get_running_loop()
+        entries: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        finished = threading.Event()
+        deadline = time.monotonic() + self._deadline_seconds
+
+        def emit(item) -> None:
+            try:
+                loop.call_soon_threadsafe(entries.put_nowait, item)
+            except RuntimeError:
+                cancelled.set()
+
+        future = self._submit(query, limit, deadline, probe, emit, cancelled, finished)
+        future.add_done_callback(lambda _: emit(_STREAM_END))
+        return self._drain(entries, deadline, cancelled, finished)
+
+    async def _drain(
+        self,
+        entries: asyncio.Queue,
+        deadline: float,
+        cancelled: threading.Event,
+        finished: threading.Event,
+    ) -> AsyncIterator[dict]:
+        # Raises ExtractionIncomplete after the last entry unless yt-dlp ran the search to its
+        # end, so callers can tell a full result list from a partial one.
+        try:
+            while True:
+                remaining = deadline + 1 - time.monotonic()
+                if remaining <= 0:
+                    raise ExtractionIncomplete("search extraction ran out of time")
+                try:
+                    item = await asyncio.wait_for(entries.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    raise ExtractionIncomplete("search extraction ran out of time") from None
+                if item is _STREAM_END:
+                    if not finished.is_set():
+                        raise ExtractionIncomplete("search extraction stopped early")
+                    return
+                yield item
+        finally:
+            # Lets the worker thread stop at the next entry if the consumer went away.
+            cancelled.set()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _acquire(self) -> bool:
+        # Returns whether this extraction holds the breaker's half-open probe.
+        with self._pending_lock:
+            if self._pending >= self._capacity:
+                EXTRACTION_REJECTED.inc()
+                raise ExtractionSaturated("search extraction pool is saturated")
+            self._pending += 1
+        admission = self._breaker.allow()
+        if admission is None:
+            with self._pending_lock:
+                self._pending -= 1
+            EXTRACTION_CIRCUIT_REJECTED.inc()
+            raise ExtractionUnavailable("search extraction is backing off after repeated failures")
+        EXTRACTION_PENDING.inc()
+        return admission == ADMIT_PROBE
+
+    def _submit(self, query: str, limit: int, deadline: float, probe: bool, *args) -> Future:
+        try:
+            future = self._executor.submit(self._extract_blocking, query, limit, deadline, probe, *args)
+        except BaseException:
+            if probe:
+                self._breaker.release_probe()
+            self._release()
+            raise
+        if probe:
+            # A probe cancelled while still queued (the caller timed out) never runs, so it
+            # could not settle the breaker itself.
+            future.add_done_callback(lambda f: f.cancelled() and self._breaker.release_probe())
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _: Future | None = None) -> None:
+        with self._pending_lock:
+            self._pending -= 1
+        EXTRACTION_PENDING.dec()
+
+    def _youtube_dl(self):
+        # YoutubeDL is not thread-safe, so each pool thread keeps and reuses its own instance.
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            ydl = YoutubeDL({**YDL_OPTS, "socket_timeout": self._socket_timeout_seconds})
+            self._local.ydl = ydl
+        return ydl
+
+    def _extract_blocking(
+        self,
+        query: str,
+        limit: int,
+        deadline: float,
+        probe: bool = False,
+        on_entry: Callable[[dict], None] | None = None,
+        cancelled: threading.Event | None = None,
+        finished: threading.Event | None = None,
+    ) -> list[dict]:
+        if YoutubeDL is None:
+            self._breaker.record(True, probe)
+            if finished is not None:
+                finished.set()
+            return []
+        start = time.monotonic()
+        outcome = "timeout"
+        attempts = 0
+        EXTRACTION_RUNNING.inc()
+        try:
+            # Retry only while the request's deadline budget still allows a useful attempt.
+            for _ in range(self._max_attempts):
+                if deadline - time.monotonic() < self._min_attempt_seconds:
+                    break
+                attempts += 1
+                entries: list[dict] = []
+                truncated = False
+                try:
+                    # process=False leaves the search results as a lazy generator, so entries
+                    # are handed over as yt-dlp parses each results page.
+                    info = self._youtube_dl().extract_info(f"ytsearch{limit}:{query}", download=False, process=False)
+                    for entry in (info or {}).get("entries") or []:
+                        if cancelled is not None and cancelled.is_set():
+                            break
+                        if time.monotonic() >= deadline:
+                            truncated = True
+                            break
+                        if not entry:
+                            continue
+                        entries.append(entry)
+                        if on_entry is not None:
+                            on_entry(entry)
+                    else:
+                        # The result generator ran out: yt-dlp returned every result.
+                        if finished is not None:
+                            finished.set()
+                except Exception:
+                    self._local.ydl = None
+                    outcome = "error"
+                    if not entries:
+                        continue
+                    # Entries were already streamed out; a retry would duplicate them.
+                    return entries
+                if truncated:
+                    outcome = "incomplete"
+                else:
+                    outcome = "ok" if entries else "empty"
+                return entries
+            return []
+        finally:
+            # A deadline spent waiting in the local queue says nothing about YouTube.
+            if attempts:
+                self._breaker.record(outcome not in FAILED_OUTCOMES, probe)
+            elif probe:
+                self._breaker.release_probe()
+            EXTRACTION_RUNNING.dec()
+            EXTRACTION_SECONDS.labels(outcome).observe(time.monotonic() - start)
@@ -1,64 +1,280 @@
+import asyncio
+import json
 import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing, asynccontextmanager
 
-from fastapi import Depends, FastAPI, Header, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from prometheus_client import Counter
 from pydantic import BaseModel
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
 
-from packages.shared.internal_auth import decode_service_token
-from packages.shared.ranking import score_candidate
+from packages.shared.catalog_search import search_catalog
+from packages.shared.db import make_session_local
+from packages.shared.internal_auth import verify_service_token
+from packages.shared.ranking import normalize_query, score_candidates
 from packages.shared.schemas import SearchResponse, SongCandidate
 from packages.shared.security import validate_security_runtime
 
-try:
-    from yt_dlp import YoutubeDL
-except Exception:
-    YoutubeDL = None
+from app.cache import SEARCH_CACHE_REQUESTS, EntryFeed, SearchCache, SingleFlight
+from app.extraction import ExtractionIncomplete, ExtractionPool, ExtractionSaturated, ExtractionUnavailable
+from app.suggest import PrefixIndex, load_new_songs
 
 
-app = FastAPI(title="search-service")
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    refresher = asyncio.create_task(refresh_suggest_index())
+    try:
+        yield
+    finally:
+        refresher.cancel()
+        extraction_pool.shutdown()
+        await search_cache.aclose()
+
+
+app = FastAPI(title="search-service", lifespan=lifespan)
 from packages.shared.observability import register_observability
 register_observability(app, app.title)
 validate_security_runtime()
 SERVICE_NAME = os.getenv("SEARCH_SERVICE_NAME", "search-service")
 
+SessionLocal = make_session_local()
+
+SEARCH_CATALOG_ENABLED = os.getenv("SEARCH_CATALOG_ENABLED", "1").lower() in {"1", "true", "yes", "on"}
+SEARCH_CATALOG_MIN_CONFIDENCE = float(os.getenv("SEARCH_CATALOG_MIN_CONFIDENCE", "0.8"))
+SEARCH_CATALOG_LIMIT = int(os.getenv("SEARCH_CATALOG_LIMIT", "10"))
+SEARCH_CATALOG_RETRY_AFTER_SECONDS = 30.0
+CATALOG_SEARCH_REQUESTS = Counter(
+    "search_catalog_requests_total",
+    "Catalog-first lookups by outcome",
+    ["result"],
+)
+_catalog_unavailable_until = 0.0
+DEGRADED_RESPONSES = Counter(
+    "search_degraded_responses_total",
+    "Demo fallback answers served instead of YouTube results",
+    ["reason"],
+)
+
+search_cache = SearchCache(
+    redis_url=os.getenv("SEARCH_CACHE_REDIS_URL") or None,
+    ttl_seconds=int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "900")),
+    stale_seconds=int(os.getenv("SEARCH_CACHE_STALE_SECONDS", "3600")),
+    local_size=int(os.getenv("SEARCH_CACHE_LOCAL_SIZE", "2048")),
+    negative_ttl_seconds=int(os.getenv("SEARCH_NEGATIVE_CACHE_TTL_SECONDS", "60")),
+)
+search_flights = SingleFlight()
+# Feeds of the streaming extractions currently in search_flights, by cache key.
+search_feeds: dict[str, EntryFeed] = {}
+suggest_index = PrefixIndex(max_recent_queries=int(os.getenv("SEARCH_SUGGEST_RECENT_QUERIES", "5000")))
+SEARCH_SUGGEST_REFRESH_SECONDS = float(os.getenv("SEARCH_SUGGEST_REFRESH_SECONDS", "30"))
+SEARCH_SUGGEST_FULL_RELOAD_SECONDS = float(os.getenv("SEARCH_SUGGEST_FULL_RELOAD_SECONDS", "900"))
+extraction_pool = ExtractionPool(
+    max_workers=int(os.getenv("SEARCH_EXTRACT_CONCURRENCY", "4")),
+    max_queue=int(os.getenv("SEARCH_EXTRACT_QUEUE_DEPTH", "16")),
+    deadline_seconds=float(os.getenv("SEARCH_EXTRACT_DEADLINE_SECONDS", "20")),
+    socket_timeout_seconds=float(os.getenv("SEARCH_EXTRACT_SOCKET_TIMEOUT_SECONDS", "8")),
+    failure_threshold=int(os.getenv("SEARCH_EXTRACT_FAILURE_THRESHOLD", "5")),
+    cooldown_seconds=float(os.getenv("SEARCH_EXTRACT_COOLDOWN_SECONDS", "30")),
+    max_cooldown_seconds=float(os.getenv("SEARCH_EXTRACT_MAX_COOLDOWN_SECONDS", "300")),
+)
+
 
 class SearchRequest(BaseModel):
     query: str
     user_id: str | None = None
 
 
-def fetch_youtube(query: str, limit: int = 20) -> list[dict]:
-    if YoutubeDL is None:
-        return []
+def demo_results(query: str) -> list[dict]:
+    return [
+        {"id": "demo-1", "title": f"{query} Official Audio", "uploader": "Demo Artist", "duration": 210},
+        {"id": "demo-2", "title": f"{query} Topic", "uploader": "Demo Artist - Topic", "duration": 212},
+        {"id": "demo-3", "title": f"{query} Lyrics", "uploader": "Demo Lyrics", "duration": 208},
+    ]
 
-    ydl_opts = {
-        "quiet": True,
-        "no_warnings": True,
-        "skip_download": True,
-        "extract_flat": True,
-        "default_search": "ytsearch",
-        "noplaylist": True,
-        "ignoreerrors": True,
-        "socket_timeout": 8,
+
+def to_candidate(item: dict) -> dict:
+    return {
+        "source_provider": "youtube",
+        "source_id": item["id"],
+        "title": item.get("title") or "Unknown",
+        "channel": item.get("channel") or item.get("uploader") or "Unknown",
+        "duration_sec": item.get("duration"),
     }
-    last_error: Exception | None = None
-    for _ in range(3):
+
+
+def rank_results(query: str, raw: list[dict]) -> SearchResponse:
+    items = [item for item in raw if item.get("id")]
+    candidates = [to_candidate(item) for item in items]
+    scores = score_candidates(query, [candidate | item for candidate, item in zip(candidates, items)])
+    for candidate, score in zip(candidates, scores):
+        candidate["confidence_score"] = score
+
+    candidates.sort(key=lambda x: x["confidence_score"], reverse=True)
+    top = [SongCandidate(**c) for c in candidates[:3]]
+    return SearchResponse(candidates=top, scoring_meta={"total_candidates": len(candidates), "version": "v2"})
+
+
+def degraded_response(query: str, reason: str) -> SearchResponse:
+    DEGRADED_RESPONSES.labels(reason).inc()
+    response = rank_results(query, demo_results(query))
+    response.scoring_meta["degraded"] = reason
+    return response
+
+
+def load_suggest_songs(since):
+    with SessionLocal() as db:
+        return load_new_songs(db, suggest_index, since)
+
+
+async def refresh_suggest_index() -> None:
+    # Full load at startup and every SEARCH_SUGGEST_FULL_RELOAD_SECONDS (the only way deleted
+    # songs leave the index); in between, only songs imported since the last watermark.
+    watermark = None
+    full_reload_at = 0.0
+    while True:
+        if time.monotonic() >= full_reload_at:
+            watermark = None
         try:
-            with YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(f"ytsearch{limit}:{query}", download=False)
-            return info.get("entries", []) if info else []
-        except Exception as exc:
-            last_error = exc
-            continue
-    if last_error:
-        return []
-    return []
+            reloaded = watermark is None
+            watermark = await run_in_threadpool(load_suggest_songs, watermark)
+            if reloaded:
+                full_reload_at = time.monotonic() + SEARCH_SUGGEST_FULL_RELOAD_SECONDS
+        except SQLAlchemyError:
+            pass
+        await asyncio.sleep(SEARCH_SUGGEST_REFRESH_SECONDS)
+
+
+def catalog_lookup(query: str) -> SearchResponse | None:
+    global _catalog_unavailable_until
+    if not SEARCH_CATALOG_ENABLED or time.monotonic() < _catalog_unavailable_until:
+        return None
+    try:
+        with SessionLocal() as db:
+            matches = search_catalog(db, query, SEARCH_CATALOG_LIMIT)
+    except SQLAlchemyError:
+        _catalog_unavailable_until = time.monotonic() + SEARCH_CATALOG_RETRY_AFTER_SECONDS
+        CATALOG_SEARCH_REQUESTS.labels("error").inc()
+        return None
+    if not matches or matches[0][1] < SEARCH_CATALOG_MIN_CONFIDENCE:
+        CATALOG_SEARCH_REQUESTS.labels("miss").inc()
+        return None
+    CATALOG_SEARCH_REQUESTS.labels("hit").inc()
+    top = [
+        SongCandidate(
+            source_provider=song.source_provider,
+            source_id=song.source_id,
+            title=song.title,
+            channel=song.source_channel or song.artist,
+            duration_sec=song.duration_sec,
+            confidence_score=round(score, 4),
+        )
+        for song, score in matches[:3]
+    ]
+    return SearchResponse(
+        candidates=top,
+        scoring_meta={"total_candidates": len(matches), "version": "v2", "source": "catalog"},
+    )
+
+
+async def resolve_search(query: str, cache_key: str) -> dict | None:
+    raw, complete = await extraction_pool.extract(query, 20)
+    if not raw:
+        # Remember the miss briefly so repeats do not queue the same doomed extraction.
+        await search_cache.set_negative(cache_key)
+        return None
+    response = rank_results(query, raw).model_dump()
+    # A truncated list is answered but, as in resolve_search_stream, never cached.
+    if complete:
+        await search_cache.set(cache_key, response)
+        suggest_index.record_query(cache_key)
+    return response
+
+
+def ndjson_line(response: SearchResponse | dict, source: str, final: bool) -> str:
+    data = response.model_dump() if isinstance(response, SearchResponse) else dict(response)
+    data["scoring_meta"] = {**data["scoring_meta"], "source": source, "final": final}
+    return json.dumps(data) + "\n"
+
+
+def ndjson_response(body) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def resolve_search_stream(query: str, cache_key: str, entries: AsyncIterator[dict], feed: EntryFeed) -> dict | None:
+    # The flight's task, independent of any one client: it fills the feed the joined streams
+    # replay and, like resolve_search, settles the cache. A partial list is never cached.
+    complete = True
+    try:
+        async with aclosing(entries):
+            async for item in entries:
+                if item.get("id"):
+                    feed.push(item)
+    except ExtractionIncomplete:
+        complete = False
+    finally:
+        feed.close()
+    if not feed.entries:
+        await search_cache.set_negative(cache_key)
+        return None
+    response = rank_results(query, feed.entries).model_dump()
+    if complete:
+        await search_cache.set(cache_key, response)
+        suggest_index.record_query(cache_key)
+    return response
+
+
+async def stream_youtube(query: str, flight: asyncio.Task, feed: EntryFeed | None) -> AsyncIterator[str]:
+    # Re-rank on every entry and emit a snapshot whenever the top 3 changes. A request that
+    # joined a non-streaming flight has no feed and only gets the final line.
+    candidates: list[dict] = []
+    emitted: list[str] = []
+    if feed is not None:
+        async for item in feed.follow():
+            candidate = to_candidate(item)
+            candidate["confidence_score"] = score_candidates(query, [candidate | item])[0]
+            candidates.append(candidate)
+            candidates.sort(key=lambda x: x["confidence_score"], reverse=True)
+            top_ids = [c["source_id"] for c in candidates[:3]]
+            if top_ids != emitted:
+                emitted = top_ids
+                meta = {"total_candidates": len(candidates), "version": "v2"}
+                yield ndjson_line({"candidates": candidates[:3], "scoring_meta": meta}, "youtube", False)
+
+    response = await asyncio.shield(flight)
+    if response is None:
+        yield ndjson_line(degraded_response(query, "no_results"), "demo", True)
+        return
+    yield ndjson_line(response, "youtube", True)
+
+
+def start_stream_flight(query: str, cache_key: str) -> tuple[asyncio.Task, EntryFeed]:
+    # Takes the pool slot here, so saturation and an open circuit surface before the response.
+    entries = extraction_pool.stream(query, 20)
+    feed = EntryFeed()
+    flight, _ = search_flights.start(cache_key, lambda: resolve_search_stream(query, cache_key, entries, feed))
+    search_feeds[cache_key] = feed
+
+    def forget_feed(_: asyncio.Task) -> None:
+        if search_feeds.get(cache_key) is feed:
+            del search_feeds[cache_key]
+
+    flight.add_done_callback(forget_feed)
+    return flight, feed
 
 
 def internal_service_dep(x_service_token: str | None = Header(default=None, alias="X-Service-Token")) -> dict:
     if not x_service_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="missing internal service token")
     try:
-        return decode_service_token(x_service_token, SERVICE_NAME)
+        return verify_service_token(x_service_token, SERVICE_NAME)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
 
@@ -68,34 +284,81 @@ def health() -> dict[str, str]:
     return {"status": "ok", "service": "search-service"}
 
 
+@app.get("/internal/suggest")
+def suggest(
+    prefix: str = Query(..., max_length=200),
+    limit: int = Query(default=8, ge=1, le=20),
+    _: dict = Depends(internal_service_dep),
+) -> dict[str, list[dict]]:
+    return {"suggestions": suggest_index.suggest(prefix, limit)}
+
+
 @app.post("/internal/search", response_model=SearchResponse)
-def search(payload: SearchRequest, _: dict = Depends(internal_service_dep)) -> SearchResponse:
-    raw = fetch_youtube(payload.query, 20)
-    if not raw:
-        raw = [
-            {"id": "demo-1", "title": f"{payload.query} Official Audio", "uploader": "Demo Artist", "duration": 210},
-            {"id": "demo-2", "title": f"{payload.query} Topic", "uploader": "Demo Artist - Topic", "duration": 212},
-            {"id": "demo-3", "title": f"{payload.query} Lyrics", "uploader": "Demo Lyrics", "duration": 208},
-        ]
-
-    ranked = []
-    for item in raw:
-        source_id = item.get("id")
-        if not source_id:
-            continue
-        candidate = {
-            "source_provider": "youtube",
-            "source_id": source_id,
-            "title": item.get("title") or "Unknown",
-            "channel": item.get("channel") or item.get("uploader") or "Unknown",
-            "duration_sec": item.get("duration"),
-        }
-        candidate["confidence_score"] = score_candidate(payload.query, candidate | item)
-        ranked.append(candidate)
-
-    ranked.sort(key=lambda x: x["confidence_score"], reverse=True)
-    top = [SongCandidate(**c) for c in ranked[:3]]
-    return SearchResponse(candidates=top, scoring_meta={"total_candidates": len(ranked), "version": "v1"})
+async def search(payload: SearchRequest, _: dict = Depends(internal_service_dep)) -> SearchResponse:
+    cache_key = normalize_query(payload.query)
+    # Cached answers cost no DB round trip, so they are checked before the catalog.
+    cached, fresh = await search_cache.get(cache_key)
+    if cached is not None:
+        suggest_index.record_query(cache_key)
+        if fresh:
+            SEARCH_CACHE_REQUESTS.labels("hit").inc()
+        else:
+            # Stale-while-revalidate: answer now, refresh once in the background.
+            SEARCH_CACHE_REQUESTS.labels("stale").inc()
+            search_flights.start(cache_key, lambda: resolve_search(payload.query, cache_key))
+        return SearchResponse(**cached)
+
+    catalog_response = await run_in_threadpool(catalog_lookup, cache_key)
+    if catalog_response is not None:
+        return catalog_response
 
+    if await search_cache.is_negative(cache_key):
+        SEARCH_CACHE_REQUESTS.labels("negative").inc()
+        return degraded_response(payload.query, "negative_cache")
 
+    try:
+        response, shared = await search_flights.do(cache_key, lambda: resolve_search(payload.query, cache_key))
+    except ExtractionSaturated as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+    except ExtractionUnavailable:
+        return degraded_response(payload.query, "circuit_open")
+    SEARCH_CACHE_REQUESTS.labels("coalesced" if shared else "miss").inc()
+    if response is None:
+        return degraded_response(payload.query, "no_results")
+    return SearchResponse(**response)
 
+
+@app.post("/internal/search/stream")
+async def search_stream(payload: SearchRequest, _: dict = Depends(internal_service_dep)) -> StreamingResponse:
+    cache_key = normalize_query(payload.query)
+    cached, fresh = await search_cache.get(cache_key)
+    if cached is not None:
+        suggest_index.record_query(cache_key)
+        if fresh:
+            SEARCH_CACHE_REQUESTS.labels("hit").inc()
+        else:
+            SEARCH_CACHE_REQUESTS.labels("stale").inc()
+            search_flights.start(cache_key, lambda: resolve_search(payload.query, cache_key))
+        return ndjson_response([ndjson_line(cached, "cache", True)])
+
+    catalog_response = await run_in_threadpool(catalog_lookup, cache_key)
+    if catalog_response is not None:
+        return ndjson_response([ndjson_line(catalog_response, "catalog", True)])
+
+    if await search_cache.is_negative(cache_key):
+        SEARCH_CACHE_REQUESTS.labels("negative").inc()
+        return ndjson_response([ndjson_line(degraded_response(payload.query, "negative_cache"), "demo", True)])
+
+    flight = search_flights.running(cache_key)
+    if flight is not None:
+        # Joins the extraction already running for this query instead of starting another.
+        SEARCH_CACHE_REQUESTS.labels("coalesced").inc()
+        return ndjson_response(stream_youtube(payload.query, flight, search_feeds.get(cache_key)))
+    try:
+        flight, feed = start_stream_flight(payload.query, cache_key)
+    except ExtractionSaturated as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+    except ExtractionUnavailable:
+        return ndjson_response([ndjson_line(degraded_response(payload.query, "circuit_open"), "demo", True)])
+    SEARCH_CACHE_REQUESTS.labels("miss").inc()
+    return ndjson_response(stream_youtube(payload.query, flight, feed))
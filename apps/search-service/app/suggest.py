@@ -0,0 +1,124 @@
+import heapq
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from packages.shared.models import Song
+from packages.shared.ranking import normalize_query
+
+CATALOG_WEIGHT = 1000.0
+
+
+def song_terms(title: str, artist: str):
+    for display in (title, artist, f"{artist} {title}"):
+        term = normalize_query(display)
+        if term:
+            yield term, display.strip()
+
+
+class PrefixIndex:
+    # Sorted list of normalised terms + bisect: the terms sharing a prefix are one contiguous
+    # run, found with two binary searches; the heaviest `limit` of the run are picked with a heap.
+    def __init__(self, max_recent_queries: int = 5000) -> None:
+        self._terms: list[str] = []
+        self._display: dict[str, str] = {}
+        self._weights: dict[str, float] = {}
+        self._catalog_terms: set[str] = set()
+        self._recent: OrderedDict[str, None] = OrderedDict()
+        self._max_recent_queries = max_recent_queries
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def _insert(self, term: str, display: str, weight: float) -> None:
+        if term not in self._weights:
+            insort(self._terms, term)
+            self._display[term] = display
+            self._weights[term] = weight
+            return
+        self._weights[term] += weight
+
+    def _remove(self, term: str) -> None:
+        i = bisect_left(self._terms, term)
+        if i < len(self._terms) and self._terms[i] == term:
+            del self._terms[i]
+        self._display.pop(term, None)
+        self._weights.pop(term, None)
+
+    def _add_catalog_term(self, term: str, display: str) -> None:
+        if term not in self._catalog_terms:
+            self._catalog_terms.add(term)
+            self._insert(term, display, CATALOG_WEIGHT)
+
+    def add_song(self, title: str, artist: str) -> None:
+        with self._lock:
+            for term, display in song_terms(title, artist):
+                self._add_catalog_term(term, display)
+
+    def replace_catalog(self, songs: list[tuple[str, str]]) -> None:
+        # Full reload: terms of songs that are gone lose their catalog weight, so deleted
+        # songs stop being suggested (a term still in the recent queries stays, as recent).
+        wanted: dict[str, str] = {}
+        for title, artist in songs:
+            for term, display in song_terms(title, artist):
+                wanted.setdefault(term, display)
+        with self._lock:
+            for term in self._catalog_terms - wanted.keys():
+                self._catalog_terms.discard(term)
+                if term in self._recent:
+                    self._weights[term] -= CATALOG_WEIGHT
+                else:
+                    self._remove(term)
+            for term, display in wanted.items():
+                self._add_catalog_term(term, display)
+
+    def record_query(self, query: str) -> None:
+        term = normalize_query(query)
+        if not term:
+            return
+        with self._lock:
+            self._insert(term, term, 1.0)
+            self._recent[term] = None
+            self._recent.move_to_end(term)
+            while len(self._recent) > self._max_recent_queries:
+                oldest, _ = self._recent.popitem(last=False)
+                if oldest not in self._catalog_terms:
+                    self._remove(oldest)
+
+    def suggest(self, prefix: str, limit: int = 8) -> list[dict]:
+        needle = normalize_query(prefix)
+        if not needle:
+            return []
+        with self._lock:
+            start = bisect_left(self._terms, needle)
+            # Every term with the prefix sorts below the prefix with its last character bumped.
+            end = bisect_left(self._terms, needle[:-1] + chr(ord(needle[-1]) + 1), lo=start)
+            top = heapq.nsmallest(
+                limit,
+                (self._terms[i] for i in range(start, end)),
+                key=lambda term: (-self._weights[term], term),
+            )
+            return [
+                {"text": self._display[term], "source": "catalog" if term in self._catalog_terms else "recent"}
+                for term in top
+            ]
+
+
+def load_new_songs(db: Session, index: PrefixIndex, since: datetime | None) -> datetime | None:
+    # since=None is a full reload, which also drops songs deleted since the last one.
+    stmt = select(Song.title, Song.artist, Song.created_at).where(Song.storage_key.is_not(None))
+    if since is not None:
+        # >= so rows sharing the watermark timestamp are not skipped; re-adding a song is a no-op.
+        stmt = stmt.where(Song.created_at >= since)
+    rows = db.execute(stmt.order_by(Song.created_at)).all()
+    if since is None:
+        index.replace_catalog([(title, artist) for title, artist, _ in rows])
+    else:
+        for title, artist, _ in rows:
+            index.add_song(title, artist)
+    return rows[-1].created_at if rows else since
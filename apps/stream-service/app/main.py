@@ -1,7 +1,5 @@
 import os
 
-import boto3
-from botocore.client import Config
 from botocore.exceptions import ClientError
 from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
@@ -9,9 +7,10 @@ from sqlalchemy import and_, select
 from sqlalchemy.orm import Session
 
 from packages.shared.db import make_engine, make_session_local
-from packages.shared.internal_auth import decode_service_token
+from packages.shared.internal_auth import verify_service_token
 from packages.shared.models import Song, UserSong
 from packages.shared.security import create_stream_token, decode_stream_token, validate_security_runtime
+from packages.shared.storage import make_s3_client
 
 
 app = FastAPI(title="stream-service")
@@ -28,14 +27,7 @@ S3_BUCKET = os.getenv("S3_BUCKET", "songs")
 PUBLIC_STREAM_BASE = os.getenv("PUBLIC_STREAM_BASE", "http://localhost:8005")
 SERVICE_NAME = os.getenv("STREAM_SERVICE_NAME", "stream-service")
 
-s3 = boto3.client(
-    "s3",
-    endpoint_url=S3_ENDPOINT,
-    aws_access_key_id=S3_ACCESS_KEY,
-    aws_secret_access_key=S3_SECRET_KEY,
-    config=Config(signature_version="s3v4"),
-    region_name="us-east-1",
-)
+s3 = make_s3_client(S3_ENDPOINT, S3_ACCESS_KEY, S3_SECRET_KEY)
 
 
 def db_dep():
@@ -50,7 +42,7 @@ def internal_service_dep(x_service_token: str | None = Header(default=None, alia
     if not x_service_token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="missing internal service token")
     try:
-        return decode_service_token(x_service_token, SERVICE_NAME)
+        return verify_service_token(x_service_token, SERVICE_NAME)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
 
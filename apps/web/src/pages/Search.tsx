@@ -1,7 +1,7 @@
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import ResponseViewer from "../components/ResponseViewer";
 import type { AppHelpers } from "../App";
-import type { SearchCandidate } from "../types";
+import type { SearchCandidate, SearchSuggestion } from "../types";
 
 type SearchPageProps = {
   helpers: AppHelpers;
@@ -12,6 +12,22 @@ type SearchPageProps = {
 export default function SearchPage({ helpers, responseText, clearResponse }: SearchPageProps) {
   const [query, setQuery] = useState("");
   const [results, setResults] = useState<SearchCandidate[]>([]);
+  const [suggestions, setSuggestions] = useState<SearchSuggestion[]>([]);
+
+  useEffect(() => {
+    const prefix = query.trim();
+    if (prefix.length < 2 || !helpers.signedIn) {
+      setSuggestions([]);
+      return;
+    }
+    const timer = window.setTimeout(() => {
+      helpers
+        .api(`/songs/suggest?prefix=${encodeURIComponent(prefix)}`)
+        .then((data) => setSuggestions((data as { suggestions?: SearchSuggestion[] }).suggestions || []))
+        .catch(() => setSuggestions([]));
+    }, 150);
+    return () => window.clearTimeout(timer);
+  }, [query, helpers]);
 
   async function runSearch() {
     if (!helpers.requireAuth()) return;
@@ -48,9 +64,15 @@ export default function SearchPage({ helpers, responseText, clearResponse }: Sea
           <input
             className="input flex-1"
             placeholder="Type song name..."
+            list="search-suggestions"
             value={query}
             onChange={(e) => setQuery(e.target.value)}
           />
+          <datalist id="search-suggestions">
+            {suggestions.map((item) => (
+              <option key={item.text} value={item.text} />
+            ))}
+          </datalist>
           <button className="btn-primary" onClick={() => runSearch().catch((e) => helpers.notify(e.message))}>
             Search
           </button>
@@ -6,6 +6,11 @@ export type SearchCandidate = {
   confidence_score: number;
 };
 
+export type SearchSuggestion = {
+  text: string;
+  source: "catalog" | "recent";
+};
+
 export type LibrarySong = {
   id: string;
   title: string;
@@ -0,0 +1,96 @@
+import argparse
+import json
+import statistics
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from packages.shared.ranking import score_candidate, score_candidates
+
+CORPUS_PATH = Path(__file__).parent / "data" / "ranking_corpus.json"
+
+BatchScorer = Callable[[str, list[dict]], list[float]]
+
+
+def load_corpus(path: Path = CORPUS_PATH) -> list[dict]:
+    return json.loads(path.read_text(encoding="utf-8"))["queries"]
+
+
+def per_item_scorer(query: str, items: list[dict]) -> list[float]:
+    return [score_candidate(query, item) for item in items]
+
+
+SCORERS: dict[str, BatchScorer] = {
+    "score_candidate": per_item_scorer,
+    "score_candidates": score_candidates,
+}
+
+
+def rank_ids(scorer: BatchScorer, query: str, entries: list[dict]) -> list[str]:
+    scores = scorer(query, entries)
+    order = sorted(range(len(entries)), key=lambda i: scores[i], reverse=True)
+    return [entries[i]["id"] for i in order]
+
+
+def evaluate_relevance(scorer: BatchScorer, corpus: list[dict]) -> dict[str, float]:
+    # precision@k is capped at the number of labelled relevant ids, so a perfect ranking scores 1.0.
+    totals = {1: 0.0, 3: 0.0}
+    for case in corpus:
+        relevant = set(case["relevant"])
+        ranked = rank_ids(scorer, case["query"], case["entries"])
+        for k in totals:
+            hits = len(relevant.intersection(ranked[:k]))
+            totals[k] += hits / min(k, len(relevant))
+    return {f"precision@{k}": total / len(corpus) for k, total in totals.items()}
+
+
+def benchmark_throughput(scorer: BatchScorer, corpus: list[dict], rounds: int, multiplier: int) -> dict[str, float]:
+    cases = [(case["query"], case["entries"] * multiplier) for case in corpus]
+    latencies: list[float] = []
+    candidates = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query, entries in cases:
+            t0 = time.perf_counter()
+            scorer(query, entries)
+            latencies.append(time.perf_counter() - t0)
+            candidates += len(entries)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "candidates_per_second": candidates / elapsed,
+        "query_p50_us": statistics.median(latencies) * 1e6,
+        "query_p95_us": latencies[int(len(latencies) * 0.95) - 1] * 1e6,
+        "candidates_per_query": candidates / len(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline ranking throughput and relevance benchmark")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--multiplier", type=int, default=1, help="repeat each query's entries to score larger sets")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    results = {}
+    for name, scorer in SCORERS.items():
+        results[name] = {
+            **benchmark_throughput(scorer, corpus, args.rounds, args.multiplier),
+            **evaluate_relevance(scorer, corpus),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{len(corpus)} queries, {sum(len(c['entries']) for c in corpus)} candidates, x{args.multiplier}, {args.rounds} rounds")
+    print(f"{'scorer':<18}{'cand/s':>12}{'p50 us':>10}{'p95 us':>10}{'P@1':>7}{'P@3':>7}")
+    for name, r in results.items():
+        print(
+            f"{name:<18}{r['candidates_per_second']:>12,.0f}{r['query_p50_us']:>10.1f}"
+            f"{r['query_p95_us']:>10.1f}{r['precision@1']:>7.2f}{r['precision@3']:>7.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session
+
+from packages.shared.models import Song
+
+# Same expression as the ix_songs_search_trgm index created by migration 0002. The
+# separators are inlined SQL literals: bound parameters would stop the index matching.
+_SPACE = literal_column("' '")
+SEARCH_DOCUMENT = func.lower(
+    Song.artist + _SPACE + Song.title + _SPACE + func.coalesce(Song.source_channel, literal_column("''"))
+)
+
+
+def search_catalog(db: Session, query: str, limit: int = 10) -> list[tuple[Song, float]]:
+    # `doc %> query` is pg_trgm's word-similarity match and can use the GIN trigram index.
+    # It is one-sided (any song containing every query word matches at ~1.0), so the score
+    # also requires the query to cover the title: "love" alone must not match "Love Story".
+    similarity = func.least(
+        func.word_similarity(query, SEARCH_DOCUMENT),
+        func.word_similarity(func.lower(Song.title), query),
+    )
+    rows = db.execute(
+        select(Song, similarity.label("similarity"))
+        .where(SEARCH_DOCUMENT.op("%>")(query), Song.storage_key.is_not(None))
+        .order_by(similarity.desc())
+        .limit(limit)
+    ).all()
+    return [(song, float(score)) for song, score in rows]
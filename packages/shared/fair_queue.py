@@ -0,0 +1,93 @@
+import json
+import time
+
+import redis
+from redis.exceptions import RedisError
+
+# Each user has a FIFO list; the ring lists every user with pending items, once.
+# A user joins the ring when their list goes from empty to non-empty.
+PUSH_SCRIPT = """
+local depth = redis.call('RPUSH', KEYS[1], ARGV[2])
+if depth == 1 then
+  redis.call('RPUSH', KEYS[2], ARGV[1])
+end
+return depth
+"""
+
+# Round-robin: take the head user, pop one of their items, and rotate them to the back
+# of the ring if they still have work. User list keys are derived in the script, so this
+# assumes a single (non-cluster) Redis.
+POP_SCRIPT = """
+local out = {}
+local want = tonumber(ARGV[2])
+while #out < want * 2 do
+  local user = redis.call('LPOP', KEYS[1])
+  if not user then
+    break
+  end
+  local key = ARGV[1] .. user
+  local item = redis.call('LPOP', key)
+  if item then
+    table.insert(out, user)
+    table.insert(out, item)
+    if redis.call('LLEN', key) > 0 then
+      redis.call('RPUSH', KEYS[1], user)
+    end
+  end
+end
+return out
+"""
+
+
+class FairQueue:
+    # Per-user sub-queues drained round-robin, so one user's bulk import cannot starve
+    # everyone else's first import. Redis errors surface as False / [] to the caller.
+    def __init__(self, url: str, prefix: str = "import:fair", socket_timeout: float = 0.5) -> None:
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+            decode_responses=True,
+        )
+        self._ring = f"{prefix}:ring"
+        self._user_prefix = f"{prefix}:user:"
+        self._push = self._client.register_script(PUSH_SCRIPT)
+        self._pop = self._client.register_script(POP_SCRIPT)
+
+    def push(self, user_id: str, item: dict) -> bool:
+        # A re-queued item keeps its original enqueued_at.
+        payload = json.dumps({"enqueued_at": time.time(), **item})
+        try:
+            self._push(keys=[self._user_prefix + user_id, self._ring], args=[user_id, payload])
+        except RedisError:
+            return False
+        return True
+
+    def pop(self, count: int) -> list[tuple[str, dict]]:
+        if count <= 0:
+            return []
+        try:
+            flat = self._pop(keys=[self._ring], args=[self._user_prefix, count])
+        except RedisError:
+            return []
+        return [(flat[i], json.loads(flat[i + 1])) for i in range(0, len(flat), 2)]
+
+    def backlog(self, max_users: int = 1000) -> dict[str, tuple[int, float | None]]:
+        # user_id -> (waiting items, enqueued_at of their oldest item)
+        try:
+            users = self._client.lrange(self._ring, 0, max_users - 1)
+            pipe = self._client.pipeline(transaction=False)
+            for user_id in users:
+                pipe.llen(self._user_prefix + user_id)
+                pipe.lindex(self._user_prefix + user_id, 0)
+            results = pipe.execute()
+        except RedisError:
+            return {}
+        backlog = {}
+        for user_id, depth, head in zip(users, results[::2], results[1::2]):
+            try:
+                oldest = float(json.loads(head)["enqueued_at"]) if head else None
+            except (ValueError, KeyError, TypeError):
+                oldest = None
+            backlog[user_id] = (depth, oldest)
+        return backlog
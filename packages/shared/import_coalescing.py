@@ -0,0 +1,102 @@
+import redis
+from redis.exceptions import RedisError
+
+# Whoever sets the lease first leads; later jobs for the same source join the follower set.
+# A leader re-claiming its own lease (a Celery retry) just extends it. The follower set
+# always outlives the lease by a full lease period and its TTL only ever grows, so a
+# renewed or handed-off lease never outlives the jobs waiting on it.
+CLAIM_SCRIPT = """
+local leader = redis.call('GET', KEYS[1])
+if not leader then
+  redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+  return false
+end
+if leader == ARGV[1] then
+  redis.call('PEXPIRE', KEYS[1], ARGV[2])
+  return false
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+local ttl = math.max(tonumber(ARGV[3]), redis.call('PTTL', KEYS[1]) + tonumber(ARGV[2]))
+if redis.call('PTTL', KEYS[2]) < ttl then
+  redis.call('PEXPIRE', KEYS[2], ttl)
+end
+return leader
+"""
+
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+  return 0
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+local ttl = tonumber(ARGV[2]) * 2
+if redis.call('PTTL', KEYS[2]) < ttl then
+  redis.call('PEXPIRE', KEYS[2], ttl)
+end
+return 1
+"""
+
+# Followers are handed back whether or not the lease is still ours: after a lease expiry
+# whoever finishes first settles everyone waiting on the source.
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  redis.call('DEL', KEYS[1])
+end
+local followers = redis.call('SMEMBERS', KEYS[2])
+redis.call('DEL', KEYS[2])
+return followers
+"""
+
+
+class ImportCoalescer:
+    # One leader job per (provider, source_id) does the download; followers attach to it
+    # and are settled by the leader. Redis errors degrade to "every job leads".
+    def __init__(self, url: str, lease_seconds: int = 900, socket_timeout: float = 1.0) -> None:
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+            decode_responses=True,
+        )
+        self._lease_ms = max(1, lease_seconds) * 1000
+        self._claim = self._client.register_script(CLAIM_SCRIPT)
+        self._renew = self._client.register_script(RENEW_SCRIPT)
+        self._release = self._client.register_script(RELEASE_SCRIPT)
+
+    @staticmethod
+    def _keys(source_provider: str, source_id: str) -> list[str]:
+        return [f"import:lease:{source_provider}:{source_id}", f"import:followers:{source_provider}:{source_id}"]
+
+    def claim(self, source_provider: str, source_id: str, job_id: str) -> str | None:
+        try:
+            return self._claim(
+                keys=self._keys(source_provider, source_id),
+                args=[job_id, self._lease_ms, self._lease_ms * 2],
+            )
+        except RedisError:
+            return None
+
+    def leader(self, source_provider: str, source_id: str) -> str | None:
+        try:
+            return self._client.get(self._keys(source_provider, source_id)[0])
+        except RedisError:
+            return None
+
+    def followers(self, source_provider: str, source_id: str) -> list[str]:
+        try:
+            return sorted(self._client.smembers(self._keys(source_provider, source_id)[1]))
+        except RedisError:
+            return []
+
+    def renew(self, source_provider: str, source_id: str, job_id: str, lease_seconds: int | None = None) -> bool:
+        lease_ms = max(1, lease_seconds) * 1000 if lease_seconds is not None else self._lease_ms
+        try:
+            return bool(self._renew(keys=self._keys(source_provider, source_id), args=[job_id, lease_ms]))
+        except RedisError:
+            return False
+
+    def release(self, source_provider: str, source_id: str, job_id: str) -> list[str]:
+        try:
+            followers = self._release(keys=self._keys(source_provider, source_id), args=[job_id])
+        except RedisError:
+            return []
+        return [f for f in followers if f != job_id]
@@ -1,32 +1,43 @@
+import hashlib
 import os
+import time
 from datetime import datetime, timedelta, timezone
+from threading import Lock
 from typing import Any
 
 from jose import JWTError, jwt
 
-from packages.shared.secrets import read_env_or_file
+from packages.shared.cache import TTLCache
+from packages.shared.secrets import CachedSecret, strict_security_enabled
 
 
 INTERNAL_ALGORITHM = "HS256"
 INTERNAL_TTL_SECONDS = int(os.getenv("INTERNAL_TOKEN_TTL_SECONDS", "60"))
+INTERNAL_TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("INTERNAL_TOKEN_REFRESH_MARGIN_SECONDS", "10"))
+INTERNAL_VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("INTERNAL_VERIFIED_TOKEN_CACHE_SIZE", "1024"))
 
+_minted_tokens: dict[tuple[str, str], tuple[str, float]] = {}
+_minted_lock = Lock()
+_verified_tokens = TTLCache(INTERNAL_VERIFIED_TOKEN_CACHE_SIZE)
 
-def internal_service_secret() -> str:
-    secret = (
-        read_env_or_file("INTERNAL_SERVICE_SECRET", "dev-internal-secret-change-me")
-        or "dev-internal-secret-change-me"
-    )
-    if not secret or not secret.strip():
-        secret = "dev-internal-secret-change-me"
-    enforce_strict = os.getenv("ENFORCE_STRICT_SECURITY", "0").lower() in {"1", "true", "yes", "on"}
-    app_env = os.getenv("APP_ENV", "development").lower()
-    prod_like = app_env in {"prod", "production", "staging"}
-    if enforce_strict or prod_like:
+
+def _validate_internal_service_secret(secret: str) -> None:
+    if strict_security_enabled():
         if secret == "dev-internal-secret-change-me":
             raise RuntimeError("INTERNAL_SERVICE_SECRET must not use development default in strict/prod mode")
         if len(secret) < 32:
             raise RuntimeError("INTERNAL_SERVICE_SECRET must be at least 32 characters in strict/prod mode")
-    return secret
+
+
+_internal_service_secret = CachedSecret(
+    "INTERNAL_SERVICE_SECRET",
+    "dev-internal-secret-change-me",
+    _validate_internal_service_secret,
+)
+
+
+def internal_service_secret() -> str:
+    return _internal_service_secret.get()
 
 
 def create_service_token(issuer_service: str, audience_service: str) -> str:
@@ -56,3 +67,36 @@ def decode_service_token(token: str, expected_audience: str) -> dict[str, Any]:
     if not claims.get("iss"):
         raise ValueError("internal service token missing issuer")
     return claims
+
+
+def service_token(issuer_service: str, audience_service: str) -> str:
+    # Reuse one token per (issuer, audience) and re-mint shortly before it expires.
+    key = (issuer_service, audience_service)
+    cached = _minted_tokens.get(key)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
+    with _minted_lock:
+        cached = _minted_tokens.get(key)
+        now = time.time()
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        token = create_service_token(issuer_service, audience_service)
+        margin = min(INTERNAL_TOKEN_REFRESH_MARGIN_SECONDS, INTERNAL_TTL_SECONDS // 2)
+        _minted_tokens[key] = (token, now + INTERNAL_TTL_SECONDS - margin)
+        return token
+
+
+def verify_service_token(token: str, expected_audience: str) -> dict[str, Any]:
+    key = (hashlib.sha256(token.encode("utf-8")).hexdigest(), expected_audience)
+    claims = _verified_tokens.get(key)
+    if claims is not None:
+        return dict(claims)
+    claims = decode_service_token(token, expected_audience)
+    _verified_tokens.set(key, claims, float(claims["exp"]))
+    return dict(claims)
+
+
+def clear_service_token_caches() -> None:
+    with _minted_lock:
+        _minted_tokens.clear()
+    _verified_tokens.clear()
@@ -0,0 +1,85 @@
+import json
+import time
+from threading import Lock
+
+import redis
+from redis.exceptions import RedisError
+
+NUMERIC_FIELDS = {
+    "downloaded_bytes",
+    "total_bytes",
+    "speed_bps",
+    "eta_seconds",
+    "position_seconds",
+    "duration_seconds",
+    "parts_done",
+    "uploaded_bytes",
+    "updated_at",
+}
+
+
+EVENTS_CHANNEL_PREFIX = "job:events:"
+
+
+def progress_key(job_id: str) -> str:
+    return f"job:progress:{job_id}"
+
+
+def events_channel(job_id: str) -> str:
+    return EVENTS_CHANNEL_PREFIX + job_id
+
+
+class JobProgress:
+    # Progress lives in a short-lived Redis hash, never in Postgres. Ticks for a job are
+    # throttled to one write per min_interval_seconds; stage changes always go through.
+    # Every write is also published on job:events:{job_id} for clients waiting on the job.
+    def __init__(
+        self,
+        url: str,
+        ttl_seconds: int = 3600,
+        min_interval_seconds: float = 0.5,
+        socket_timeout: float = 0.25,
+    ) -> None:
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+            decode_responses=True,
+        )
+        self._ttl_seconds = ttl_seconds
+        self._min_interval_seconds = min_interval_seconds
+        self._last: dict[str, tuple[float, str]] = {}
+        self._lock = Lock()
+
+    def publish(self, job_id: str, stage: str, force: bool = False, **fields) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last_at, last_stage = self._last.get(job_id, (0.0, ""))
+            if not force and stage == last_stage and now - last_at < self._min_interval_seconds:
+                return False
+            self._last[job_id] = (now, stage)
+        mapping = {"stage": stage, "updated_at": round(time.time(), 3)}
+        mapping.update({k: (round(v, 3) if isinstance(v, float) else v) for k, v in fields.items() if v is not None})
+        key = progress_key(job_id)
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, self._ttl_seconds)
+            pipe.publish(events_channel(job_id), json.dumps(mapping))
+            pipe.execute()
+        except RedisError:
+            return False
+        return True
+
+    def forget(self, job_id: str) -> None:
+        with self._lock:
+            self._last.pop(job_id, None)
+
+    def read(self, job_id: str) -> dict | None:
+        try:
+            raw = self._client.hgetall(progress_key(job_id))
+        except RedisError:
+            return None
+        if not raw:
+            return None
+        return {k: (float(v) if k in NUMERIC_FIELDS else v) for k, v in raw.items()}
@@ -62,6 +62,9 @@ class DownloadJob(Base):
     candidate_meta: Mapped[str | None] = mapped_column(Text, nullable=True)
     status: Mapped[str] = mapped_column(String(20), default="queued")
     failure_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Last pipeline stage that finished, and the context needed to resume after it.
+    stage: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    checkpoint: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
 
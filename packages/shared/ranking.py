@@ -1,22 +1,47 @@
 import re
-from difflib import SequenceMatcher
+
+PENALTY_PATTERN = re.compile(r"\b(live|cover|remix)\b")
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _trigrams(text: str) -> frozenset[str]:
+    padded = f"  {text} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _dice(query_grams: frozenset[str], grams: frozenset[str]) -> float:
+    if not query_grams or not grams:
+        return 0.0
+    return 2.0 * len(query_grams & grams) / (len(query_grams) + len(grams))
+
+
+def score_candidates(query: str, items: list[dict]) -> list[float]:
+    # The query is normalised and split into trigrams once for the whole batch;
+    # character-trigram Dice similarity stands in for difflib's SequenceMatcher ratio.
+    query_l = normalize_query(query)
+    query_grams = _trigrams(query_l) if query_l else frozenset()
+    scores: list[float] = []
+    for item in items:
+        title = normalize_query(item.get("title") or "")
+        channel = normalize_query(item.get("channel") or item.get("uploader") or "")
+
+        score = _dice(query_grams, _trigrams(title)) * 0.55
+        score += _dice(query_grams, _trigrams(channel)) * 0.15
+        if "official" in title or "official" in channel:
+            score += 0.1
+        if "topic" in channel:
+            score += 0.08
+        if PENALTY_PATTERN.search(title):
+            score -= 0.15
+        views = float(item.get("view_count") or 0)
+        if views > 0:
+            score += min(0.25, (views / 50_000_000.0))
+        scores.append(max(0.0, min(1.0, score)))
+    return scores
 
 
 def score_candidate(query: str, item: dict) -> float:
-    title = (item.get("title") or "").lower()
-    channel = (item.get("channel") or item.get("uploader") or "").lower()
-    query_l = query.lower()
-
-    score = 0.0
-    score += SequenceMatcher(None, query_l, title).ratio() * 0.55
-    score += SequenceMatcher(None, query_l, channel).ratio() * 0.15
-    if "official" in title or "official" in channel:
-        score += 0.1
-    if "topic" in channel:
-        score += 0.08
-    if re.search(r"\b(live|cover|remix)\b", title):
-        score -= 0.15
-    views = float(item.get("view_count") or 0)
-    if views > 0:
-        score += min(0.25, (views / 50_000_000.0))
-    return max(0.0, min(1.0, score))
+    return score_candidates(query, [item])[0]
@@ -1,21 +1,135 @@
+import os
 import time
-from collections import defaultdict, deque
+from collections import OrderedDict
 from threading import Lock
 
+import redis.asyncio as redis_asyncio
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+
+RATE_LIMIT_FALLBACKS = Counter(
+    "rate_limit_backend_fallbacks_total",
+    "Rate limit checks answered by the in-memory fallback because Redis was unavailable",
+)
+
+# GCRA over every key in one round trip: all keys must conform before any is consumed.
+# ARGV holds (emission_interval_ms, window_ms) pairs, one per key.
+GCRA_SCRIPT = """
+local now = redis.call('TIME')
+local now_ms = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local tats = {}
+for i = 1, #KEYS do
+  local emission = tonumber(ARGV[i * 2 - 1])
+  local window = tonumber(ARGV[i * 2])
+  local tat = tonumber(redis.call('GET', KEYS[i]) or now_ms)
+  if tat < now_ms then
+    tat = now_ms
+  end
+  local new_tat = tat + emission
+  if new_tat - now_ms > window then
+    return 0
+  end
+  tats[i] = new_tat
+end
+for i = 1, #KEYS do
+  redis.call('SET', KEYS[i], tats[i], 'PX', math.max(1, math.ceil(tats[i] - now_ms)))
+end
+return 1
+"""
+
 
 class InMemoryRateLimiter:
-    def __init__(self) -> None:
-        self._events: dict[str, deque[float]] = defaultdict(deque)
+    # GCRA keeps a single "theoretical arrival time" float per key instead of a deque
+    # of timestamps. A key whose TAT is in the past is indistinguishable from a new
+    # key, so idle keys are swept periodically and the LRU tail is evicted at max_keys.
+    def __init__(self, max_keys: int = 100_000, sweep_interval_seconds: float = 30.0) -> None:
+        self._tats: OrderedDict[str, float] = OrderedDict()
         self._lock = Lock()
+        self._max_keys = max(1, max_keys)
+        self._sweep_interval_seconds = sweep_interval_seconds
+        self._next_sweep = time.monotonic() + sweep_interval_seconds
 
     def check(self, key: str, limit: int, window_seconds: int) -> bool:
-        now = time.time()
-        cutoff = now - window_seconds
+        return self.check_many([(key, limit, window_seconds)])
+
+    def check_many(self, checks: list[tuple[str, int, int]]) -> bool:
+        if any(limit <= 0 for _, limit, _ in checks):
+            return False
+        now = time.monotonic()
         with self._lock:
-            q = self._events[key]
-            while q and q[0] < cutoff:
-                q.popleft()
-            if len(q) >= limit:
-                return False
-            q.append(now)
+            if now >= self._next_sweep:
+                self._sweep(now)
+            updates = []
+            for key, limit, window_seconds in checks:
+                tat = max(self._tats.get(key, now), now)
+                new_tat = tat + window_seconds / limit
+                if new_tat - now > window_seconds + 1e-6:
+                    return False
+                updates.append((key, new_tat))
+            for key, new_tat in updates:
+                self._tats[key] = new_tat
+                self._tats.move_to_end(key)
+            while len(self._tats) > self._max_keys:
+                self._tats.popitem(last=False)
             return True
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def _sweep(self, now: float) -> None:
+        self._tats = OrderedDict((key, tat) for key, tat in self._tats.items() if tat > now)
+        self._next_sweep = now + self._sweep_interval_seconds
+
+
+class RedisRateLimiter:
+    def __init__(
+        self,
+        url: str,
+        key_prefix: str = "ratelimit:",
+        socket_timeout: float = 0.25,
+        retry_after_seconds: float = 5.0,
+        fallback: InMemoryRateLimiter | None = None,
+    ) -> None:
+        self._redis = redis_asyncio.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self._script = self._redis.register_script(GCRA_SCRIPT)
+        self._key_prefix = key_prefix
+        self._retry_after_seconds = retry_after_seconds
+        self._fallback = fallback or InMemoryRateLimiter()
+        self._unavailable_until = 0.0
+
+    async def check(self, key: str, limit: int, window_seconds: int) -> bool:
+        return await self.check_many([(key, limit, window_seconds)])
+
+    async def check_many(self, checks: list[tuple[str, int, int]]) -> bool:
+        if any(limit <= 0 for _, limit, _ in checks):
+            return False
+        if time.monotonic() < self._unavailable_until:
+            RATE_LIMIT_FALLBACKS.inc()
+            return self._fallback.check_many(checks)
+        keys = []
+        args: list[float] = []
+        for key, limit, window_seconds in checks:
+            window_ms = window_seconds * 1000.0
+            keys.append(f"{self._key_prefix}{key}")
+            args.extend([window_ms / limit, window_ms])
+        try:
+            return bool(await self._script(keys=keys, args=args))
+        except RedisError:
+            # Don't hammer a dead Redis on every request; retry it after a short pause.
+            self._unavailable_until = time.monotonic() + self._retry_after_seconds
+            RATE_LIMIT_FALLBACKS.inc()
+            return self._fallback.check_many(checks)
+
+
+def make_rate_limiter() -> InMemoryRateLimiter | RedisRateLimiter:
+    backend = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
+    max_keys = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    if backend == "redis":
+        return RedisRateLimiter(
+            os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/2"),
+            socket_timeout=float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT_SECONDS", "0.25")),
+            fallback=InMemoryRateLimiter(max_keys),
+        )
+    if backend != "memory":
+        raise RuntimeError(f"unknown RATE_LIMIT_BACKEND {backend!r}")
+    return InMemoryRateLimiter(max_keys)
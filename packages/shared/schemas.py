@@ -83,3 +83,5 @@ class JobOut(BaseModel):
     source_id: str
     status: str
     failure_reason: str | None = None
+    stage: str | None = None
+    progress: dict | None = None
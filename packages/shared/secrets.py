@@ -1,5 +1,7 @@
 import os
+from collections.abc import Callable
 from pathlib import Path
+from threading import Lock
 
 
 def read_env_or_file(name: str, default: str | None = None) -> str | None:
@@ -14,3 +16,52 @@ def read_env_or_file(name: str, default: str | None = None) -> str | None:
             return value
 
     return default
+
+
+def strict_security_enabled() -> bool:
+    enforce_strict = os.getenv("ENFORCE_STRICT_SECURITY", "0").lower() in {"1", "true", "yes", "on"}
+    app_env = os.getenv("APP_ENV", "development").lower()
+    return enforce_strict or app_env in {"prod", "production", "staging"}
+
+
+class CachedSecret:
+    # Keyed on the raw env values, the *_FILE mtime and the strict flag: a rotated
+    # secret file is picked up without re-reading or re-validating on every call.
+    def __init__(self, name: str, default: str, validate: Callable[[str], None] | None = None) -> None:
+        self.name = name
+        self.default = default
+        self._validate = validate
+        self._lock = Lock()
+        self._fingerprint: tuple | None = None
+        self._value: str | None = None
+
+    def _current_fingerprint(self) -> tuple:
+        direct = os.getenv(self.name)
+        file_var = os.getenv(f"{self.name}_FILE")
+        mtime_ns = None
+        if (direct is None or not direct.strip()) and file_var and file_var.strip():
+            try:
+                mtime_ns = os.stat(file_var.strip()).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+        return (direct, file_var, mtime_ns, strict_security_enabled())
+
+    def get(self) -> str:
+        fingerprint = self._current_fingerprint()
+        value = self._value
+        if value is not None and fingerprint == self._fingerprint:
+            return value
+        with self._lock:
+            secret = read_env_or_file(self.name, self.default) or self.default
+            if not secret.strip():
+                secret = self.default
+            if self._validate is not None:
+                self._validate(secret)
+            self._value = secret
+            self._fingerprint = fingerprint
+            return secret
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._value = None
+            self._fingerprint = None
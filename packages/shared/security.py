@@ -7,7 +7,8 @@ from jose import JWTError, jwt
 from passlib.exc import MissingBackendError
 from passlib.context import CryptContext
 
-from packages.shared.secrets import read_env_or_file
+from packages.shared.internal_auth import internal_service_secret
+from packages.shared.secrets import CachedSecret, strict_security_enabled
 
 
 def _build_password_context() -> CryptContext:
@@ -24,19 +25,19 @@ pwd_context = _build_password_context()
 USING_ARGON2 = "argon2" in (pwd_context.schemes() or [])
 
 
-def jwt_secret() -> str:
-    secret = read_env_or_file("JWT_SECRET", "dev-secret-change-me") or "dev-secret-change-me"
-    if not secret or not secret.strip():
-        secret = "dev-secret-change-me"
-    enforce_strict = os.getenv("ENFORCE_STRICT_SECURITY", "0").lower() in {"1", "true", "yes", "on"}
-    app_env = os.getenv("APP_ENV", "development").lower()
-    prod_like = app_env in {"prod", "production", "staging"}
-    if enforce_strict or prod_like:
+def _validate_jwt_secret(secret: str) -> None:
+    if strict_security_enabled():
         if secret == "dev-secret-change-me":
             raise RuntimeError("JWT_SECRET must not use the development default in strict/prod mode")
         if len(secret) < 32:
             raise RuntimeError("JWT_SECRET must be at least 32 characters in strict/prod mode")
-    return secret
+
+
+_jwt_secret = CachedSecret("JWT_SECRET", "dev-secret-change-me", _validate_jwt_secret)
+
+
+def jwt_secret() -> str:
+    return _jwt_secret.get()
 
 
 ALGORITHM = "HS256"
@@ -106,10 +107,8 @@ def decode_stream_token(token: str, expected_song_id: str) -> dict[str, Any]:
 
 
 def validate_security_runtime() -> None:
-    # Trigger secret validation and ensure strong hashing in strict/prod mode.
+    # Resolve and validate secrets once at startup and ensure strong hashing in strict/prod mode.
     jwt_secret()
-    enforce_strict = os.getenv("ENFORCE_STRICT_SECURITY", "0").lower() in {"1", "true", "yes", "on"}
-    app_env = os.getenv("APP_ENV", "development").lower()
-    prod_like = app_env in {"prod", "production", "staging"}
-    if (enforce_strict or prod_like) and not USING_ARGON2:
+    internal_service_secret()
+    if strict_security_enabled() and not USING_ARGON2:
         raise RuntimeError("Argon2 hashing backend is required in strict/prod mode")
@@ -0,0 +1,149 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Callable
+
+import boto3
+from botocore.client import Config
+from botocore.exceptions import ClientError
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+def make_s3_client(
+    endpoint_url: str,
+    access_key: str,
+    secret_key: str,
+    region_name: str = "us-east-1",
+    max_pool_connections: int = 10,
+):
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        config=Config(signature_version="s3v4", max_pool_connections=max_pool_connections),
+        region_name=region_name,
+    )
+
+
+def ensure_bucket(s3, bucket: str) -> None:
+    try:
+        s3.head_bucket(Bucket=bucket)
+        return
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") not in {"404", "NoSuchBucket"}:
+            raise
+    try:
+        s3.create_bucket(Bucket=bucket)
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") not in {"BucketAlreadyOwnedByYou", "BucketAlreadyExists"}:
+            raise
+
+
+def object_exists(s3, bucket: str, key: str) -> bool:
+    try:
+        s3.head_object(Bucket=bucket, Key=key)
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+            return False
+        raise
+    return True
+
+
+def read_full(stream: BinaryIO, size: int) -> bytes:
+    # Pipes return short reads; S3 requires every part but the last to be >= 5 MiB.
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+class MultipartUpload:
+    # Reads a non-seekable stream part by part and uploads parts on a small thread pool.
+    # At most max_workers parts are in flight, so memory stays around part_size * (max_workers + 1).
+    def __init__(
+        self,
+        s3,
+        bucket: str,
+        key: str,
+        part_size: int = DEFAULT_PART_SIZE,
+        max_workers: int = 4,
+        content_type: str | None = None,
+        on_part: Callable[[int, int], None] | None = None,
+    ) -> None:
+        self._s3 = s3
+        self._bucket = bucket
+        self._key = key
+        self._part_size = max(MIN_PART_SIZE, part_size)
+        self._max_workers = max(1, max_workers)
+        self._content_type = content_type
+        self._upload_id: str | None = None
+        self._parts: list[dict] = []
+        self._on_part = on_part
+        self._progress_lock = threading.Lock()
+        self._parts_done = 0
+        self._bytes_done = 0
+        self.bytes_written = 0
+
+    def write_from(self, stream: BinaryIO) -> int:
+        extra = {"ContentType": self._content_type} if self._content_type else {}
+        self._upload_id = self._s3.create_multipart_upload(Bucket=self._bucket, Key=self._key, **extra)["UploadId"]
+        slots = threading.BoundedSemaphore(self._max_workers)
+        futures: list[Future] = []
+        with ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="s3-part") as executor:
+            part_number = 1
+            while True:
+                slots.acquire()
+                if any(f.done() and f.exception() for f in futures):
+                    slots.release()
+                    break
+                body = read_full(stream, self._part_size)
+                if not body:
+                    slots.release()
+                    break
+                future = executor.submit(self._upload_part, part_number, body)
+                future.add_done_callback(lambda _: slots.release())
+                futures.append(future)
+                self.bytes_written += len(body)
+                part_number += 1
+        self._parts = [f.result() for f in futures]
+        if not self._parts:
+            raise ValueError(f"nothing to upload to {self._key}")
+        return self.bytes_written
+
+    def _upload_part(self, part_number: int, body: bytes) -> dict:
+        response = self._s3.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        if self._on_part is not None:
+            # Parts finish out of order on the pool; report running totals, not part numbers.
+            with self._progress_lock:
+                self._parts_done += 1
+                self._bytes_done += len(body)
+                parts_done, bytes_done = self._parts_done, self._bytes_done
+            self._on_part(parts_done, bytes_done)
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    def complete(self) -> None:
+        self._s3.complete_multipart_upload(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+    def abort(self) -> None:
+        if self._upload_id is None:
+            return
+        self._s3.abort_multipart_upload(Bucket=self._bucket, Key=self._key, UploadId=self._upload_id)
+        self._upload_id = None
@@ -0,0 +1,17 @@
+import time
+
+ENQUEUED_AT_HEADER = "enqueued_at"
+
+# Celery's Redis transport keeps each priority level of a queue as its own list.
+PRIORITY_STEPS = (0, 3, 6, 9)
+PRIORITY_SEP = "\x06\x16"
+
+
+def stamp_enqueued_at(headers: dict | None = None, **_) -> None:
+    # Connected to before_task_publish by every producer, so workers can report queue age.
+    if headers is not None:
+        headers[ENQUEUED_AT_HEADER] = time.time()
+
+
+def broker_lists(queue: str) -> list[str]:
+    return [queue if pri == 0 else f"{queue}{PRIORITY_SEP}{pri}" for pri in PRIORITY_STEPS]
@@ -0,0 +1,67 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+import redis
+import redis.asyncio as redis_asyncio
+
+APPS_DIR = Path(__file__).resolve().parents[1] / "apps"
+
+# Every service ships its own top-level `app` package; each service's modules are kept
+# aside while another service's are loaded, so no module (or its metrics) is imported twice.
+_service_modules: dict[str, dict] = {}
+_current_service: list[str] = []
+
+
+def _load_app_module(service: str, name: str):
+    if _current_service != [service]:
+        if _current_service:
+            _service_modules[_current_service[0]] = {
+                mod: sys.modules.pop(mod) for mod in list(sys.modules) if mod == "app" or mod.startswith("app.")
+            }
+        sys.modules.update(_service_modules.pop(service, {}))
+        _current_service[:] = [service]
+    path = str(APPS_DIR / service)
+    sys.path.insert(0, path)
+    try:
+        return importlib.import_module(f"app.{name}")
+    finally:
+        sys.path.remove(path)
+
+
+@pytest.fixture
+def app_module():
+    return _load_app_module
+
+
+@pytest.fixture
+def unreachable_redis_url() -> str:
+    return "redis://127.0.0.1:1/0"
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    # Every sync and asyncio client built with Redis.from_url talks to one in-process server.
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        redis.Redis,
+        "from_url",
+        classmethod(
+            lambda cls, url, **kwargs: fakeredis.FakeRedis(
+                server=server, decode_responses=kwargs.get("decode_responses", False)
+            )
+        ),
+    )
+    monkeypatch.setattr(
+        redis_asyncio.Redis,
+        "from_url",
+        classmethod(
+            lambda cls, url, **kwargs: fakeredis.FakeAsyncRedis(
+                server=server, decode_responses=kwargs.get("decode_responses", False)
+            )
+        ),
+    )
+    return server
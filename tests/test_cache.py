@@ -0,0 +1,25 @@
+import time
+
+from packages.shared.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    expires_at = time.time() + 60
+    cache.set("a", 1, expires_at)
+    cache.set("b", 2, expires_at)
+    assert cache.get("a") == 1
+    cache.set("c", 3, expires_at)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_drops_expired_entries():
+    cache = TTLCache(maxsize=4)
+    cache.set("gone", 1, time.time() - 1)
+    cache.set("soon", 2, time.time() + 0.01)
+    time.sleep(0.02)
+    assert cache.get("gone") is None
+    assert cache.get("soon") is None
+    assert len(cache) == 0
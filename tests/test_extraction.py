@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+class FakeYoutubeDL:
+    def __init__(self, opts) -> None:
+        pass
+
+    def extract_info(self, url, download=False, process=True):
+        return {"entries": [{"id": "a"}, {"id": "b"}]}
+
+
+def test_probe_cancelled_in_local_queue_releases_half_open(app_module, monkeypatch):
+    extraction = app_module("search-service", "extraction")
+    monkeypatch.setattr(extraction, "YoutubeDL", FakeYoutubeDL)
+    pool = extraction.ExtractionPool(
+        max_workers=1,
+        max_queue=4,
+        deadline_seconds=0.05,
+        min_attempt_seconds=0.01,
+        failure_threshold=1,
+        cooldown_seconds=0.01,
+    )
+    pool._breaker.record(False)
+    blocker = threading.Event()
+    pool._executor.submit(blocker.wait)
+    try:
+        asyncio.run(asyncio.sleep(0.02))
+        # The probe waits behind the busy thread until the caller's timeout cancels it.
+        assert asyncio.run(pool.extract("q")) == ([], False)
+        assert not pool._breaker._probing
+    finally:
+        blocker.set()
+    entries, complete = asyncio.run(pool.extract("q"))
+    assert [entry["id"] for entry in entries] == ["a", "b"]
+    assert complete
+    assert pool._breaker.allow() == extraction.ADMIT_CLOSED
+    pool.shutdown()
+
+
+def test_circuit_opens_probes_and_doubles_its_cooldown(app_module, monkeypatch):
+    extraction = app_module("search-service", "extraction")
+    now = [100.0]
+    monkeypatch.setattr(extraction.time, "monotonic", lambda: now[0])
+    breaker = extraction.CircuitBreaker(failure_threshold=2, cooldown_seconds=10, max_cooldown_seconds=35)
+    breaker.record(False)
+    assert breaker.allow() == extraction.ADMIT_CLOSED
+    breaker.record(False)
+    assert breaker.allow() is None
+    now[0] += 10
+    assert breaker.allow() == extraction.ADMIT_PROBE
+    assert breaker.allow() is None
+    breaker.record(False, probe=True)
+    now[0] += 19
+    assert breaker.allow() is None
+    now[0] += 1
+    assert breaker.allow() == extraction.ADMIT_PROBE
+    breaker.release_probe()
+    assert breaker.allow() == extraction.ADMIT_PROBE
+    breaker.record(False, probe=True)
+    now[0] += 35
+    assert breaker.allow() == extraction.ADMIT_PROBE
+    breaker.record(True, probe=True)
+    assert breaker.allow() == extraction.ADMIT_CLOSED
+    breaker.record(False)
+    assert breaker.allow() == extraction.ADMIT_CLOSED
+    breaker.record(False)
+    now[0] += 10
+    assert breaker.allow() == extraction.ADMIT_PROBE
+
+
+def test_extraction_stops_at_the_deadline(app_module, monkeypatch):
+    extraction = app_module("search-service", "extraction")
+
+    class SlowYoutubeDL(FakeYoutubeDL):
+        def extract_info(self, url, download=False, process=True):
+            def entries():
+                for i in range(10):
+                    time.sleep(0.03)
+                    yield {"id": str(i)}
+
+            return {"entries": entries()}
+
+    monkeypatch.setattr(extraction, "YoutubeDL", SlowYoutubeDL)
+    pool = extraction.ExtractionPool(
+        max_workers=1, max_queue=0, deadline_seconds=0.1, min_attempt_seconds=0.01, failure_threshold=1
+    )
+    entries, complete = asyncio.run(pool.extract("q"))
+    assert 0 < len(entries) < 10
+    assert not complete
+    # A search the deadline cut short is a failed extraction, not a success.
+    assert pool._breaker.allow() is None
+    pool.shutdown()
+
+
+def test_extraction_skips_attempts_the_deadline_cannot_fit(app_module, monkeypatch):
+    extraction = app_module("search-service", "extraction")
+    calls = []
+
+    class CountingYoutubeDL(FakeYoutubeDL):
+        def extract_info(self, url, download=False, process=True):
+            calls.append(url)
+            return super().extract_info(url, download, process)
+
+    monkeypatch.setattr(extraction, "YoutubeDL", CountingYoutubeDL)
+    pool = extraction.ExtractionPool(
+        max_workers=1, max_queue=0, deadline_seconds=0.5, min_attempt_seconds=1.0, failure_threshold=1
+    )
+    assert asyncio.run(pool.extract("q")) == ([], False)
+    assert calls == []
+    # Time lost before any attempt is not held against YouTube.
+    assert pool._breaker.allow() == extraction.ADMIT_CLOSED
+    pool.shutdown()
+
+
+def test_extraction_rejects_work_beyond_pool_capacity(app_module, monkeypatch):
+    extraction = app_module("search-service", "extraction")
+    blocker = threading.Event()
+
+    class BlockingYoutubeDL(FakeYoutubeDL):
+        def extract_info(self, url, download=False, process=True):
+            blocker.wait(5)
+            return super().extract_info(url, download, process)
+
+    monkeypatch.setattr(extraction, "YoutubeDL", BlockingYoutubeDL)
+    pool = extraction.ExtractionPool(max_workers=1, max_queue=1, deadline_seconds=5, min_attempt_seconds=0.01)
+
+    async def run():
+        first = asyncio.create_task(pool.extract("a"))
+        second = asyncio.create_task(pool.extract("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(extraction.ExtractionSaturated):
+            await pool.extract("c")
+        blocker.set()
+        assert len((await first)[0]) == 2
+        assert len((await second)[0]) == 2
+        assert len((await pool.extract("d"))[0]) == 2
+
+    try:
+        asyncio.run(run())
+    finally:
+        blocker.set()
+        pool.shutdown()
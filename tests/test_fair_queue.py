@@ -0,0 +1,21 @@
+from packages.shared.fair_queue import FairQueue
+
+
+def test_push_and_pop_degrade_when_redis_is_unavailable(unreachable_redis_url):
+    queue = FairQueue(unreachable_redis_url, socket_timeout=0.05)
+    assert not queue.push("u1", {"job_id": "j1"})
+    assert queue.pop(5) == []
+
+
+def test_users_are_served_round_robin(fake_redis):
+    queue = FairQueue("redis://fake")
+    for n in range(4):
+        assert queue.push("bulk", {"job_id": f"b{n}"})
+    queue.push("other", {"job_id": "o0"})
+    queue.push("third", {"job_id": "t0"})
+    assert {user: depth for user, (depth, _) in queue.backlog().items()} == {"bulk": 4, "other": 1, "third": 1}
+    popped = [item["job_id"] for _, item in queue.pop(3)]
+    assert popped == ["b0", "o0", "t0"]
+    queue.push("other", {"job_id": "o1"})
+    assert [item["job_id"] for _, item in queue.pop(10)] == ["b1", "o1", "b2", "b3"]
+    assert queue.backlog() == {}
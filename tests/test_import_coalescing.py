@@ -0,0 +1,36 @@
+import time
+
+from packages.shared.import_coalescing import ImportCoalescer
+
+
+def test_claim_degrades_to_leader_when_redis_is_unavailable(unreachable_redis_url):
+    coalescer = ImportCoalescer(unreachable_redis_url, socket_timeout=0.05)
+    assert coalescer.claim("youtube", "abc", "job-1") is None
+    assert coalescer.release("youtube", "abc", "job-1") == []
+
+
+def test_followers_attach_to_leader_and_are_released_once(fake_redis):
+    coalescer = ImportCoalescer("redis://fake")
+    assert coalescer.claim("youtube", "abc", "job-1") is None
+    assert coalescer.claim("youtube", "abc", "job-2") == "job-1"
+    assert coalescer.claim("youtube", "abc", "job-2") == "job-1"
+    assert coalescer.claim("youtube", "abc", "job-1") is None
+    assert not coalescer.renew("youtube", "abc", "job-2")
+    assert coalescer.followers("youtube", "abc") == ["job-2"]
+    assert coalescer.release("youtube", "abc", "job-1") == ["job-2"]
+    assert coalescer.release("youtube", "abc", "job-1") == []
+    assert coalescer.claim("youtube", "abc", "job-3") is None
+
+
+def test_followers_outlive_a_renewed_lease(fake_redis, monkeypatch):
+    coalescer = ImportCoalescer("redis://fake", lease_seconds=10)
+    assert coalescer.claim("youtube", "abc", "job-1") is None
+    assert coalescer.claim("youtube", "abc", "job-2") == "job-1"
+    assert coalescer.renew("youtube", "abc", "job-1", lease_seconds=60)
+    # A follower joining later must not shorten the set below the handed-off lease.
+    assert coalescer.claim("youtube", "abc", "job-3") == "job-1"
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 50)
+    assert coalescer.leader("youtube", "abc") == "job-1"
+    assert coalescer.followers("youtube", "abc") == ["job-2", "job-3"]
+    assert sorted(coalescer.release("youtube", "abc", "job-1")) == ["job-2", "job-3"]
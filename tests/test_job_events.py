@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+import redis
+import redis.asyncio as redis_asyncio
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+
+def test_events_fan_out_and_a_gap_is_signalled_with_resync(app_module, fake_redis, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    job_events = app_module("download-service", "job_events")
+    drops = []
+
+    class DroppingRedis(fakeredis.FakeAsyncRedis):
+        # The subscription dies on the next message once a drop is armed.
+        def pubsub(self, **kwargs):
+            pubsub = super().pubsub(**kwargs)
+            listen = pubsub.listen
+
+            async def dropping_listen():
+                async for message in listen():
+                    if drops and message["type"] == "pmessage":
+                        drops.pop()
+                        raise RedisConnectionError("connection lost")
+                    yield message
+
+            pubsub.listen = dropping_listen
+            return pubsub
+
+    monkeypatch.setattr(
+        redis_asyncio.Redis,
+        "from_url",
+        classmethod(lambda cls, url, **kwargs: DroppingRedis(server=fake_redis, decode_responses=True)),
+    )
+    publisher = redis.Redis.from_url("redis://fake", decode_responses=True)
+
+    async def subscribed() -> None:
+        while publisher.pubsub_numpat() < 1:
+            await asyncio.sleep(0.01)
+
+    async def scenario() -> None:
+        hub = job_events.JobEventHub("redis://fake", retry_seconds=0.01)
+        with hub.subscribe("job-1") as events:
+            hub.start()
+            await subscribed()
+            assert await asyncio.wait_for(events.get(), 1) is job_events.RESYNC
+            publisher.publish("job:events:job-2", json.dumps({"stage": "download"}))
+            publisher.publish("job:events:job-1", json.dumps({"stage": "transcode"}))
+            assert await asyncio.wait_for(events.get(), 1) == {"stage": "transcode"}
+
+            drops.append(True)
+            publisher.publish("job:events:job-1", json.dumps({"stage": "store"}))
+            # The lost event is never replayed; the waiter is told to re-read the job instead.
+            assert await asyncio.wait_for(events.get(), 1) is job_events.RESYNC
+            assert events.empty()
+        assert hub._waiters == {}
+        await hub.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_slow_reader_keeps_the_latest_events(app_module):
+    job_events = app_module("download-service", "job_events")
+    hub = job_events.JobEventHub("redis://unused", queue_size=2)
+    with hub.subscribe("job-1") as events:
+        for n in range(5):
+            hub._dispatch("job-1", {"n": n})
+        assert [events.get_nowait()["n"] for _ in range(2)] == [3, 4]
+    assert hub._waiters == {}
@@ -0,0 +1,28 @@
+import json
+
+import redis
+
+from packages.shared.job_progress import JobProgress, events_channel
+
+
+def test_publish_is_best_effort_when_redis_is_unavailable(unreachable_redis_url):
+    progress = JobProgress(unreachable_redis_url, socket_timeout=0.05)
+    assert not progress.publish("job-1", "download", downloaded_bytes=10)
+    assert progress.read("job-1") is None
+
+
+def test_ticks_are_throttled_but_stage_changes_are_not(fake_redis):
+    progress = JobProgress("redis://fake", min_interval_seconds=60)
+    listener = redis.Redis.from_url("redis://fake", decode_responses=True).pubsub()
+    listener.subscribe(events_channel("job-1"))
+    assert progress.publish("job-1", "download", downloaded_bytes=10, total_bytes=100)
+    assert not progress.publish("job-1", "download", downloaded_bytes=50)
+    assert progress.publish("job-1", "transcode", position_seconds=1.5, eta_seconds=None)
+    state = progress.read("job-1")
+    assert state["stage"] == "transcode"
+    assert state["downloaded_bytes"] == 10.0
+    assert state["position_seconds"] == 1.5
+    assert "eta_seconds" not in state
+    messages = iter(listener.get_message, None)
+    notified = [json.loads(m["data"])["stage"] for m in messages if m["type"] == "message"]
+    assert notified == ["download", "transcode"]
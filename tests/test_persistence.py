@@ -0,0 +1,70 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from packages.shared.db import Base
+from packages.shared.models import DownloadJob, UserSong
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def add_job(db: Session, job_id: str, status: str = "queued", user_id: str = "u1") -> None:
+    db.add(DownloadJob(id=job_id, user_id=user_id, source_id="abc", status=status))
+    db.commit()
+
+
+def job_status(db: Session, job_id: str) -> str:
+    return db.scalar(select(DownloadJob.status).where(DownloadJob.id == job_id))
+
+
+def test_grant_ownership_ignores_duplicate_owners(app_module, db):
+    persistence = app_module("download-worker", "persistence")
+    song_id = persistence.insert_song(db, title="t", artist="a", source_provider="youtube", source_id="abc")
+    assert persistence.insert_song(db, title="t", artist="a", source_provider="youtube", source_id="abc") == song_id
+    persistence.grant_ownership(db, ["u1", "u2", "u1"], song_id)
+    persistence.grant_ownership(db, ["u2", "u3"], song_id)
+    persistence.grant_ownership(db, [], song_id)
+    db.commit()
+    owners = db.scalars(select(UserSong.user_id).where(UserSong.song_id == song_id))
+    assert sorted(owners) == ["u1", "u2", "u3"]
+    assert db.scalar(select(func.count()).select_from(UserSong)) == 3
+
+
+def test_completed_jobs_are_never_moved_back(app_module, db):
+    persistence = app_module("download-worker", "persistence")
+    add_job(db, "done", status="completed")
+    add_job(db, "queued")
+    add_job(db, "failed", status="failed")
+    assert not persistence.start_job(db, "done")
+    assert not persistence.fail_job(db, "done", "late failure")
+    assert persistence.start_job(db, "failed")
+    assert persistence.fail_job(db, "queued", "x" * 600)
+    assert not persistence.fail_job(db, "queued", "again")
+    assert persistence.complete_jobs(db, ["done", "failed", "missing"]) == 1
+    assert persistence.complete_jobs(db, []) == 0
+    db.commit()
+    assert job_status(db, "done") == "completed"
+    assert job_status(db, "failed") == "completed"
+    assert job_status(db, "queued") == "failed"
+    assert len(db.get(DownloadJob, "queued").failure_reason) == 500
+
+
+def test_record_stage_only_while_processing(app_module, db):
+    persistence = app_module("download-worker", "persistence")
+    add_job(db, "job")
+    assert not persistence.record_stage(db, "job", "download", {"path": "a"})
+    assert persistence.job_checkpoint(db, "job") == (None, None)
+    assert persistence.start_job(db, "job")
+    assert persistence.record_stage(db, "job", "transcode", {"path": "b"})
+    assert persistence.job_checkpoint(db, "job") == ("transcode", {"path": "b"})
+    assert persistence.complete_jobs(db, ["job"]) == 1
+    assert not persistence.record_stage(db, "job", "store", {"path": "c"})
+    assert persistence.job_checkpoint(db, "job") == (None, None)
+    assert persistence.job_checkpoint(db, "missing") == (None, None)
@@ -0,0 +1,30 @@
+import pytest
+
+# Stands in for the worker's configured TRANSCODE_BITRATE_KBPS.
+TRANSCODE = "transcode bitrate"
+
+
+@pytest.fixture
+def worker(app_module, monkeypatch):
+    monkeypatch.setenv("INTERNAL_SERVICE_SECRET", "x" * 40)
+    monkeypatch.setenv("JWT_SECRET", "y" * 40)
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    return app_module("download-worker", "worker")
+
+
+@pytest.mark.parametrize(
+    "info, expected",
+    [
+        ({"acodec": "mp4a.40.2", "ext": "m4a", "abr": 129.478}, ("passthrough", "aac", 129)),
+        ({"acodec": "mp4a.40.5", "ext": "mp4", "abr": 48.2}, ("remux", "aac", 48)),
+        ({"acodec": "opus", "ext": "webm", "abr": 160}, ("transcode", "aac", TRANSCODE)),
+        ({"acodec": "mp4a.40.2", "ext": "m4a"}, ("passthrough", "aac", None)),
+        ({"acodec": "mp4a.40.2", "ext": "mp4", "abr": 0}, ("remux", "aac", None)),
+        ({}, ("transcode", "aac", TRANSCODE)),
+    ],
+)
+def test_plan_audio(worker, info, expected):
+    path, codec, bitrate = expected
+    if bitrate is TRANSCODE:
+        bitrate = worker.TRANSCODE_BITRATE_KBPS
+    assert worker.plan_audio(info) == (path, codec, bitrate)
@@ -1,4 +1,7 @@
-from packages.shared.ranking import score_candidate
+import pytest
+
+from benchmarks.ranking_bench import evaluate_relevance, load_corpus
+from packages.shared.ranking import score_candidate, score_candidates
 
 
 def test_official_beats_live_variant():
@@ -15,3 +18,34 @@ def test_official_beats_live_variant():
     }
 
     assert score_candidate(query, official) > score_candidate(query, live)
+
+
+def test_batch_ranks_official_audio_above_covers_and_live_versions():
+    query = "Song Name  Artist"
+    items = [
+        {"title": "Song Name (Live at Wembley)", "channel": "Artist", "view_count": 3_000_000},
+        {"title": "Song Name (Cover)", "uploader": "Someone Else", "view_count": 1_000_000},
+        {"title": "Song Name", "channel": "Artist - Topic", "view_count": 5_000_000},
+        {"title": "Song Name - Official Audio", "channel": "Artist", "view_count": 20_000_000},
+        {"title": None, "channel": None},
+    ]
+    scores = score_candidates(query, items)
+    ranked = sorted(range(len(items)), key=lambda i: scores[i], reverse=True)
+    assert ranked == [3, 2, 0, 1, 4]
+    assert scores[3] == pytest.approx(0.675, abs=1e-3)
+    assert scores[4] == 0.0
+    assert score_candidates(query, []) == []
+
+
+def test_view_boost_is_capped():
+    query = "song name artist"
+    popular = {"title": "Song Name (Cover)", "channel": "Someone", "view_count": 50_000_000}
+    viral = {**popular, "view_count": 5_000_000_000}
+    assert score_candidate(query, viral) == score_candidate(query, popular)
+
+
+def test_relevance_corpus_does_not_regress():
+    corpus = load_corpus()
+    metrics = evaluate_relevance(score_candidates, corpus)
+    assert metrics["precision@1"] >= 0.9
+    assert metrics["precision@3"] >= 0.85
@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import redis.asyncio as redis_asyncio
+
+from packages.shared.rate_limit import InMemoryRateLimiter, RedisRateLimiter
+
+
+def test_in_memory_limiter_blocks_after_limit():
+    limiter = InMemoryRateLimiter()
+    assert all(limiter.check("k", 3, 60) for _ in range(3))
+    assert not limiter.check("k", 3, 60)
+    assert limiter.check("other", 3, 60)
+
+
+def test_check_many_consumes_nothing_when_any_key_is_over_limit():
+    limiter = InMemoryRateLimiter()
+    assert limiter.check("email", 1, 60)
+    assert not limiter.check_many([("ip", 5, 60), ("email", 1, 60)])
+    assert all(limiter.check("ip", 5, 60) for _ in range(5))
+
+
+def test_redis_limiter_falls_back_to_memory_when_unavailable(unreachable_redis_url):
+    limiter = RedisRateLimiter(unreachable_redis_url, socket_timeout=0.05)
+
+    async def run():
+        assert await limiter.check_many([("ip", 2, 60), ("email", 2, 60)])
+        assert await limiter.check("ip", 2, 60)
+        assert not await limiter.check("ip", 2, 60)
+
+    asyncio.run(run())
+
+
+def test_redis_limiter_allows_burst_then_refills(fake_redis):
+    limiter = RedisRateLimiter("redis://fake/0")
+    client = redis_asyncio.Redis.from_url("redis://fake/0")
+
+    async def run():
+        assert all([await limiter.check("k", 3, 0.3) for _ in range(3)])
+        assert await client.exists("ratelimit:k")
+        assert not await limiter.check("k", 3, 0.3)
+        assert await limiter.check("other", 3, 0.3)
+        await asyncio.sleep(0.12)
+        assert await limiter.check("k", 3, 0.3)
+        assert not await limiter.check("k", 3, 0.3)
+
+    asyncio.run(run())
+
+
+def test_redis_check_many_consumes_nothing_when_any_key_is_over_limit(fake_redis):
+    limiter = RedisRateLimiter("redis://fake/0")
+    client = redis_asyncio.Redis.from_url("redis://fake/0")
+
+    async def run():
+        assert await limiter.check("email", 1, 60)
+        assert not await limiter.check_many([("ip", 5, 60), ("email", 1, 60)])
+        assert not await client.exists("ratelimit:ip")
+        assert all([await limiter.check("ip", 5, 60) for _ in range(5)])
+        assert not await limiter.check("ip", 5, 60)
+
+    asyncio.run(run())
+
+
+def test_in_memory_limiter_caps_tracked_keys():
+    limiter = InMemoryRateLimiter(max_keys=3)
+    for i in range(10):
+        assert limiter.check(f"ip:{i}", 5, 60)
+    assert len(limiter) == 3
+
+
+def test_in_memory_limiter_sweeps_idle_keys():
+    limiter = InMemoryRateLimiter(sweep_interval_seconds=0)
+    assert limiter.check("short", 10, 0.01)
+    time.sleep(0.02)
+    assert limiter.check("long", 10, 60)
+    assert len(limiter) == 1
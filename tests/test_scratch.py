@@ -0,0 +1,37 @@
+import json
+import os
+import time
+from pathlib import Path
+
+
+def test_put_replaces_an_expired_entry_for_the_same_key(app_module, tmp_path):
+    scratch = app_module("download-worker", "scratch")
+    cache = scratch.ScratchCache(str(tmp_path), max_bytes=1 << 20, ttl_seconds=60)
+    with cache.workdir() as workdir:
+        first = Path(workdir) / "a.webm"
+        first.write_bytes(b"old")
+        stored = cache.put("youtube:abc", first, {"n": 1})
+    meta = stored.parent / scratch.META_FILE
+    os.utime(meta, (time.time() - 120, time.time() - 120))
+    # An evict() sweep has not run yet, so the stale directory is still in place.
+    assert stored.parent.is_dir()
+    with cache.workdir() as workdir:
+        second = Path(workdir) / "b.webm"
+        second.write_bytes(b"new")
+        replaced = cache.put("youtube:abc", second, {"n": 2})
+    assert replaced.read_bytes() == b"new"
+    path, info = cache.get("youtube:abc")
+    assert path == replaced and info == {"n": 2}
+    assert json.loads(meta.read_text())["file"] == "b.webm"
+
+
+def test_least_recently_used_entries_are_evicted_past_max_bytes(app_module, tmp_path):
+    scratch = app_module("download-worker", "scratch")
+    cache = scratch.ScratchCache(str(tmp_path), max_bytes=1500, ttl_seconds=60)
+    for key in ("a", "b", "c"):
+        with cache.workdir() as workdir:
+            source = Path(workdir) / "x.webm"
+            source.write_bytes(b"0" * 600)
+            cache.put(key, source, {})
+    assert cache.get("a") is None
+    assert cache.get("b") is not None and cache.get("c") is not None
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+
+def test_single_flight_runs_concurrent_callers_once(app_module):
+    cache = app_module("search-service", "cache")
+    flight = cache.SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"items": [1]}
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("q", fetch) for _ in range(5)))
+        assert calls == [1]
+        assert [shared for _, shared in results].count(False) == 1
+        assert all(value == {"items": [1]} for value, _ in results)
+        assert flight.running("q") is None
+        await flight.do("q", fetch)
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_single_flight_survives_a_cancelled_caller(app_module):
+    cache = app_module("search-service", "cache")
+    flight = cache.SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        first = asyncio.create_task(flight.do("q", fetch))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flight.do("q", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == ("done", True)
+
+    asyncio.run(run())
+
+
+def test_search_cache_serves_stale_entries_until_they_expire(app_module, monkeypatch):
+    cache = app_module("search-service", "cache")
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    search_cache = cache.SearchCache(None, ttl_seconds=60, stale_seconds=30, local_size=8)
+
+    async def run():
+        assert await search_cache.get("q") == (None, False)
+        await search_cache.set("q", {"items": [1]})
+        assert await search_cache.get("q") == ({"items": [1]}, True)
+        now[0] += 61
+        assert await search_cache.get("q") == ({"items": [1]}, False)
+        now[0] += 30
+        assert await search_cache.get("q") == (None, False)
+
+    asyncio.run(run())
+
+
+def test_search_cache_negative_entries_expire(app_module, monkeypatch):
+    cache = app_module("search-service", "cache")
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    search_cache = cache.SearchCache(None, ttl_seconds=60, stale_seconds=30, local_size=8, negative_ttl_seconds=10)
+    disabled = cache.SearchCache(None, ttl_seconds=60, stale_seconds=30, local_size=8, negative_ttl_seconds=0)
+
+    async def run():
+        assert not await search_cache.is_negative("q")
+        await search_cache.set_negative("q")
+        assert await search_cache.is_negative("q")
+        now[0] += 11
+        assert not await search_cache.is_negative("q")
+        await disabled.set_negative("q")
+        assert not await disabled.is_negative("q")
+
+    asyncio.run(run())
+
+
+def test_search_cache_shares_entries_through_redis(app_module, fake_redis):
+    cache = app_module("search-service", "cache")
+    writer = cache.SearchCache("redis://fake/0", ttl_seconds=60, stale_seconds=30, local_size=8)
+    reader = cache.SearchCache("redis://fake/0", ttl_seconds=60, stale_seconds=30, local_size=8)
+
+    async def run():
+        await writer.set("q", {"items": [1]})
+        await writer.set_negative("nothing")
+        assert await reader.get("q") == ({"items": [1]}, True)
+        assert await reader.is_negative("nothing")
+        assert not await reader.is_negative("q")
+
+    asyncio.run(run())
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+
+class FakeYoutubeDL:
+    def __init__(self, opts) -> None:
+        pass
+
+    def extract_info(self, url, download=False, process=True):
+        return {"entries": [{"id": "a", "title": "Song A"}, {"id": "b", "title": "Song B"}]}
+
+
+class StallingYoutubeDL(FakeYoutubeDL):
+    def extract_info(self, url, download=False, process=True):
+        def entries():
+            yield {"id": "a", "title": "Song A"}
+            yield {"id": "b", "title": "Song B"}
+            time.sleep(0.3)
+            yield {"id": "c", "title": "Song C"}
+
+        return {"entries": entries()}
+
+
+@pytest.fixture
+def search_main(app_module, monkeypatch):
+    monkeypatch.setenv("INTERNAL_SERVICE_SECRET", "x" * 40)
+    monkeypatch.setenv("JWT_SECRET", "y" * 40)
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    main = app_module("search-service", "main")
+    monkeypatch.setattr(main, "search_cache", main.SearchCache(None, ttl_seconds=60, stale_seconds=60, local_size=16))
+    monkeypatch.setattr(main, "search_flights", main.SingleFlight())
+    monkeypatch.setattr(main, "search_feeds", {})
+    monkeypatch.setattr(main, "suggest_index", main.PrefixIndex())
+    monkeypatch.setattr(main, "catalog_lookup", lambda query: None)
+    return main
+
+
+def use_pool(main, app_module, monkeypatch, youtube_dl, deadline_seconds: float = 5.0):
+    extraction = app_module("search-service", "extraction")
+    monkeypatch.setattr(extraction, "YoutubeDL", youtube_dl)
+    pool = extraction.ExtractionPool(
+        max_workers=2, max_queue=2, deadline_seconds=deadline_seconds, min_attempt_seconds=0.01
+    )
+    monkeypatch.setattr(main, "extraction_pool", pool)
+    return pool
+
+
+def test_resolve_search_caches_a_complete_result(search_main, app_module, monkeypatch):
+    pool = use_pool(search_main, app_module, monkeypatch, FakeYoutubeDL)
+    response = asyncio.run(search_main.resolve_search("Song", "song"))
+    assert [c["source_id"] for c in response["candidates"]] == ["a", "b"]
+    cached, fresh = asyncio.run(search_main.search_cache.get("song"))
+    assert cached == response and fresh
+    assert len(search_main.suggest_index) == 1
+    pool.shutdown()
+
+
+def test_resolve_search_does_not_cache_a_result_cut_short_by_the_deadline(search_main, app_module, monkeypatch):
+    pool = use_pool(search_main, app_module, monkeypatch, StallingYoutubeDL, deadline_seconds=0.1)
+    response = asyncio.run(search_main.resolve_search("Song", "song"))
+    assert sorted(c["source_id"] for c in response["candidates"]) == ["a", "b"]
+    assert asyncio.run(search_main.search_cache.get("song")) == (None, False)
+    assert len(search_main.suggest_index) == 0
+    pool.shutdown()
+
+
+async def stream_lines(main, query: str):
+    response = await main.search_stream(main.SearchRequest(query=query), {})
+    async for line in response.body_iterator:
+        yield json.loads(line)
+
+
+def test_stream_joins_the_running_extraction_and_replays_its_entries(search_main, app_module, monkeypatch):
+    calls = []
+    resume = threading.Event()
+
+    class PausingYoutubeDL(FakeYoutubeDL):
+        def extract_info(self, url, download=False, process=True):
+            calls.append(url)
+
+            def entries():
+                yield {"id": "a", "title": "Song A"}
+                yield {"id": "b", "title": "Song B"}
+                resume.wait(5)
+                yield {"id": "c", "title": "Song"}
+
+            return {"entries": entries()}
+
+    pool = use_pool(search_main, app_module, monkeypatch, PausingYoutubeDL)
+
+    async def run():
+        first = stream_lines(search_main, "Song")
+        first_lines = [await anext(first), await anext(first)]
+        assert [len(line["candidates"]) for line in first_lines] == [1, 2]
+        second = stream_lines(search_main, "Song")
+        second_lines = [await anext(second), await anext(second)]
+        assert [len(line["candidates"]) for line in second_lines] == [1, 2]
+        resume.set()
+        first_lines += [line async for line in first]
+        second_lines += [line async for line in second]
+        return first_lines, second_lines
+
+    try:
+        first_lines, second_lines = asyncio.run(run())
+    finally:
+        resume.set()
+        pool.shutdown()
+    assert len(calls) == 1
+    for lines in (first_lines, second_lines):
+        assert not any(line["scoring_meta"]["final"] for line in lines[:-1])
+        final = lines[-1]
+        assert final["scoring_meta"]["final"] is True
+        assert final["scoring_meta"]["source"] == "youtube"
+        assert final["candidates"][0]["source_id"] == "c"
+        assert final["scoring_meta"]["total_candidates"] == 3
+    cached, fresh = asyncio.run(search_main.search_cache.get("song"))
+    assert cached["candidates"] == final["candidates"] and fresh
+
+
+def test_incomplete_stream_is_answered_but_not_cached(search_main, app_module, monkeypatch):
+    pool = use_pool(search_main, app_module, monkeypatch, StallingYoutubeDL, deadline_seconds=0.1)
+
+    async def run():
+        return [line async for line in stream_lines(search_main, "Song")]
+
+    try:
+        lines = asyncio.run(run())
+    finally:
+        pool.shutdown()
+    final = lines[-1]
+    assert final["scoring_meta"]["final"] is True
+    assert final["scoring_meta"]["source"] == "youtube"
+    assert sorted(c["source_id"] for c in final["candidates"]) == ["a", "b"]
+    assert asyncio.run(search_main.search_cache.get("song")) == (None, False)
+    assert not asyncio.run(search_main.search_cache.is_negative("song"))
+    assert len(search_main.suggest_index) == 0
+    assert search_main.search_feeds == {}
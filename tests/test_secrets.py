@@ -0,0 +1,30 @@
+import os
+
+from packages.shared.secrets import CachedSecret
+
+
+def test_cached_secret_rereads_file_only_when_mtime_changes(monkeypatch, tmp_path):
+    secret_file = tmp_path / "secret.txt"
+    secret_file.write_text("first-secret\n", encoding="utf-8")
+    monkeypatch.delenv("TEST_ROTATING_SECRET", raising=False)
+    monkeypatch.setenv("TEST_ROTATING_SECRET_FILE", str(secret_file))
+    validated: list[str] = []
+    secret = CachedSecret("TEST_ROTATING_SECRET", "default", validated.append)
+
+    assert secret.get() == "first-secret"
+    assert secret.get() == "first-secret"
+    assert validated == ["first-secret"]
+
+    secret_file.write_text("second-secret\n", encoding="utf-8")
+    stat = secret_file.stat()
+    os.utime(secret_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert secret.get() == "second-secret"
+    assert validated == ["first-secret", "second-secret"]
+
+
+def test_cached_secret_env_value_wins_over_file(monkeypatch, tmp_path):
+    secret_file = tmp_path / "secret.txt"
+    secret_file.write_text("from-file", encoding="utf-8")
+    monkeypatch.setenv("TEST_ENV_SECRET_FILE", str(secret_file))
+    monkeypatch.setenv("TEST_ENV_SECRET", "from-env")
+    assert CachedSecret("TEST_ENV_SECRET", "default").get() == "from-env"
@@ -1,6 +1,12 @@
 import pytest
 
-from packages.shared.internal_auth import create_service_token, decode_service_token
+from packages.shared.internal_auth import (
+    clear_service_token_caches,
+    create_service_token,
+    decode_service_token,
+    service_token,
+    verify_service_token,
+)
 from packages.shared.security import (
     create_access_token,
     create_refresh_token,
@@ -51,6 +57,22 @@ def test_internal_service_token_roundtrip():
     assert claims["type"] == "internal_service"
 
 
+def test_service_token_is_reused_until_refresh():
+    clear_service_token_caches()
+    first = service_token("api-gateway", "search-service")
+    assert service_token("api-gateway", "search-service") == first
+    assert service_token("api-gateway", "catalog-service") != first
+
+
+def test_verified_service_token_cache_checks_audience():
+    clear_service_token_caches()
+    token = service_token("api-gateway", "search-service")
+    assert verify_service_token(token, "search-service")["iss"] == "api-gateway"
+    assert verify_service_token(token, "search-service")["aud"] == "search-service"
+    with pytest.raises(ValueError):
+        verify_service_token(token, "stream-service")
+
+
 def test_strict_mode_rejects_default_jwt_secret(monkeypatch):
     monkeypatch.setenv("ENFORCE_STRICT_SECURITY", "1")
     monkeypatch.setenv("JWT_SECRET", "dev-secret-change-me")
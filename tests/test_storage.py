@@ -0,0 +1,95 @@
+import io
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+
+from packages.shared.storage import MIN_PART_SIZE, MultipartUpload, ensure_bucket, object_exists
+
+
+class FakeS3:
+    def __init__(self, fail_part: int | None = None) -> None:
+        self.parts: dict[int, bytes] = {}
+        self.completed = None
+        self.aborted = False
+        self.fail_part = fail_part
+        self._lock = threading.Lock()
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_part:
+            raise RuntimeError("part failed")
+        with self._lock:
+            self.parts[PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.completed = MultipartUpload["Parts"]
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted = True
+
+
+class TrickleStream(io.RawIOBase):
+    # Behaves like a pipe: never returns more than 64 KiB per read.
+    def __init__(self, data: bytes) -> None:
+        self._data = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._data.read(min(size, 64 * 1024))
+
+
+def test_multipart_upload_fills_parts_from_short_reads():
+    data = bytes(range(256)) * (MIN_PART_SIZE * 2 // 256 + 100)
+    s3 = FakeS3()
+    upload = MultipartUpload(s3, "bucket", "key", part_size=MIN_PART_SIZE, max_workers=2)
+    assert upload.write_from(TrickleStream(data)) == len(data)
+    upload.complete()
+    assert [p["PartNumber"] for p in s3.completed] == [1, 2, 3]
+    assert len(s3.parts[1]) == MIN_PART_SIZE
+    assert b"".join(s3.parts[n] for n in sorted(s3.parts)) == data
+
+
+def test_multipart_upload_surfaces_part_failure_and_aborts():
+    s3 = FakeS3(fail_part=1)
+    upload = MultipartUpload(s3, "bucket", "key", part_size=MIN_PART_SIZE, max_workers=1)
+    with pytest.raises(RuntimeError):
+        upload.write_from(io.BytesIO(b"x" * (MIN_PART_SIZE * 3)))
+    upload.abort()
+    assert s3.aborted and s3.completed is None
+
+
+def test_ensure_bucket_creates_only_when_missing():
+    class BucketClient:
+        def __init__(self, exists: bool) -> None:
+            self.exists = exists
+            self.created = False
+
+        def head_bucket(self, Bucket):
+            if not self.exists:
+                raise ClientError({"Error": {"Code": "404"}}, "HeadBucket")
+
+        def create_bucket(self, Bucket):
+            self.created = True
+
+    present, missing = BucketClient(True), BucketClient(False)
+    ensure_bucket(present, "songs")
+    ensure_bucket(missing, "songs")
+    assert not present.created and missing.created
+
+
+def test_object_exists_treats_only_not_found_as_missing():
+    class ObjectClient:
+        def __init__(self, code: str | None) -> None:
+            self.code = code
+
+        def head_object(self, Bucket, Key):
+            if self.code is not None:
+                raise ClientError({"Error": {"Code": self.code}}, "HeadObject")
+
+    assert object_exists(ObjectClient(None), "songs", "key")
+    assert not object_exists(ObjectClient("404"), "songs", "key")
+    with pytest.raises(ClientError):
+        object_exists(ObjectClient("403"), "songs", "key")
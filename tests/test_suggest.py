@@ -0,0 +1,42 @@
+def test_heaviest_terms_win_across_the_whole_prefix_range(app_module):
+    suggest = app_module("search-service", "suggest")
+    index = suggest.PrefixIndex()
+    # Many light terms sort before the catalog term for the same short prefix.
+    for n in range(200):
+        index.record_query(f"a{n:03d} query")
+    index.add_song("Zebra", "Abba")
+    index.record_query("a150 query")
+    results = index.suggest("a", 3)
+    assert [r["text"] for r in results] == ["Abba", "Abba Zebra", "a150 query"]
+    assert [r["source"] for r in results] == ["catalog", "catalog", "recent"]
+
+
+def test_prefix_range_stops_at_the_boundary(app_module):
+    suggest = app_module("search-service", "suggest")
+    index = suggest.PrefixIndex()
+    for query in ("abb", "abba", "abbb", "abc", "ab"):
+        index.record_query(query)
+    assert sorted(r["text"] for r in index.suggest("abb", 10)) == ["abb", "abba", "abbb"]
+    assert index.suggest("abz", 10) == []
+    assert index.suggest("   ", 10) == []
+
+
+def test_full_reload_drops_deleted_songs_but_keeps_recent_queries(app_module):
+    suggest = app_module("search-service", "suggest")
+    index = suggest.PrefixIndex()
+    index.add_song("Hello", "Adele")
+    index.add_song("Halo", "Beyonce")
+    index.record_query("hello")
+    index.replace_catalog([("Halo", "Beyonce")])
+    assert [r["text"] for r in index.suggest("adele", 5)] == []
+    assert [(r["text"], r["source"]) for r in index.suggest("hel", 5)] == [("Hello", "recent")]
+    assert [r["source"] for r in index.suggest("halo", 5)] == ["catalog"]
+
+
+def test_recent_queries_are_bounded(app_module):
+    suggest = app_module("search-service", "suggest")
+    index = suggest.PrefixIndex(max_recent_queries=2)
+    for query in ("one", "two", "three"):
+        index.record_query(query)
+    assert len(index) == 2
+    assert index.suggest("one", 5) == []
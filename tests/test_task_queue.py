@@ -0,0 +1,12 @@
+from packages.shared.task_queue import ENQUEUED_AT_HEADER, broker_lists, stamp_enqueued_at
+
+
+def test_stamp_sets_enqueued_at_on_publish_headers():
+    headers = {"task": "app.worker.download_audio"}
+    stamp_enqueued_at(headers=headers, body=(), routing_key="download")
+    assert isinstance(headers[ENQUEUED_AT_HEADER], float)
+    stamp_enqueued_at(headers=None)
+
+
+def test_broker_lists_cover_every_priority_level():
+    assert broker_lists("download") == ["download", "download\x06\x163", "download\x06\x166", "download\x06\x169"]